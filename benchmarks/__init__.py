@@ -0,0 +1,8 @@
+"""
+Performance benchmarks for the Shiftboard API client.
+
+Each benchmark module can be run as a script from the top of the tree:
+
+  python -m benchmarks.codec_bench
+
+"""
@@ -0,0 +1,162 @@
+"""
+End-to-end benchmarks against an in-process fake api server, needing no
+network or credentials.
+
+  python -m benchmarks.api_bench [--sizes 1000,10000,100000] [--scenarios shifts,signing]
+                                 [--batch 1000] [--post] [--stream] [--output results.jsonl]
+
+Each scenario runs for each organization size (number of shifts) in a
+fresh interpreter, so that peak memory is its own, and prints one JSON
+object per run: api calls and bytes seen by the client and the server,
+wall time, and peak resident memory.
+"""
+import argparse
+import datetime
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import shiftboard
+from shiftboard.instrument import CallStats
+from benchmarks.fakeserver import FakeOrg, FakeServer
+
+ACCESS_KEY_ID = 'bench-key-id'
+SIGNATURE_KEY = 'bench-signature-key'
+
+
+def shifts(session, org, args):
+    """Iterate every shift of the organization"""
+    n = 0
+    for shift in session.Shifts(batch=args.batch):
+        n += 1
+    return n
+
+
+def denormalize(session, org, args):
+    """Load every shift, then replace its ids with fetched records"""
+    results = session.Shifts(batch=args.batch)
+    results.load_all()
+    results.denormalizeWorkgroups()
+    results.denormalizeAccounts()
+    results.denormalizeLocations()
+    return len(results)
+
+
+def whoson(session, org, args):
+    """Iterate the timeclocks of everyone clocked in"""
+    n = 0
+    for timeclock in session.WhosOnTimeclocks(batch=args.batch):
+        n += 1
+    return n
+
+
+def create(session, org, args):
+    """Create shifts one call at a time"""
+    count = min(org.shifts, args.creates)
+    start = datetime.datetime(2017, 1, 1, 9)
+    for n in xrange(count):
+        session.Shift().create(
+            start_date=start + datetime.timedelta(hours=n),
+            workgroup=str(200000 + n % org.workgroups),
+            subject='Created %d' % (n,))
+    return count
+
+
+def signing(session, org, args):
+    """Encode and sign shift.list requests, without sending them"""
+    params = {'select': {'workgroup': '200001'}, 'extended': True}
+    for n in xrange(org.shifts):
+        params['page'] = {'start': n + 1, 'batch': args.batch}
+        handle = session.api_class(session, 'shift.list', n)
+        handle.json_params = session.codec.dumps(params)
+        handle.body if args.post else handle.url
+    return org.shifts
+
+
+SCENARIOS = (shifts, denormalize, whoson, create, signing)
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run(scenario, size, args):
+    """Run one scenario against a fresh server, returning its measurements"""
+    org = FakeOrg(shifts=size)
+    server = FakeServer(org, ACCESS_KEY_ID, SIGNATURE_KEY).start()
+    session = shiftboard.Session(ACCESS_KEY_ID, SIGNATURE_KEY, url=server.url,
+                                 post=args.post, stream=args.stream)
+    stats = CallStats().attach(session)
+    rss_before = peak_rss_kb()
+    try:
+        start = time.time()
+        items = scenario(session, org, args)
+        elapsed = time.time() - start
+    finally:
+        session.close()
+        server.stop()
+    methods = stats.snapshot().values()
+    return {
+        'scenario': scenario.__name__,
+        'size': size,
+        'batch': args.batch,
+        'post': args.post,
+        'stream': args.stream,
+        'codec': session.codec.name,
+        'items': items,
+        'calls': sum(m['calls'] for m in methods),
+        'errors': sum(m['errors'] for m in methods),
+        'params_bytes': sum(m['params_bytes'] for m in methods),
+        'response_bytes': sum(m['response_bytes'] for m in methods),
+        'wire_bytes': sum(m['wire_bytes'] for m in methods),
+        'server_requests': server.requests,
+        'server_bytes': server.bytes_sent,
+        'seconds': elapsed,
+        'rss_before_kb': rss_before,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def main():
+    names = [scenario.__name__ for scenario in SCENARIOS]
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='comma-separated organization sizes, up to 1000000')
+    parser.add_argument('--scenarios', default=','.join(names))
+    parser.add_argument('--batch', type=int, default=shiftboard.MAX_BATCH_SIZE)
+    parser.add_argument('--creates', type=int, default=500,
+                        help='most shifts created by the create scenario')
+    parser.add_argument('--post', action='store_true')
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--output', help='append results to this file')
+    parser.add_argument('--child', nargs=2, metavar=('SCENARIO', 'SIZE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        scenario = dict(zip(names, SCENARIOS))[args.child[0]]
+        print json.dumps(run(scenario, int(args.child[1]), args), sort_keys=True)
+        return
+
+    output = open(args.output, 'a') if args.output else None
+    options = ['--batch', str(args.batch), '--creates', str(args.creates)]
+    options += ['--post'] * args.post + ['--stream'] * args.stream
+    for name in args.scenarios.split(','):
+        if name not in names:
+            parser.error('unknown scenario %s' % (name,))
+        for size in args.sizes.split(','):
+            line = subprocess.check_output(
+                [sys.executable, '-m', 'benchmarks.api_bench',
+                 '--child', name, size] + options).strip()
+            print line
+            sys.stdout.flush()
+            if output:
+                output.write(line + '\n')
+    if output:
+        output.close()
+
+
+if __name__ == '__main__':
+    main()
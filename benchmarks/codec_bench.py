@@ -0,0 +1,53 @@
+"""
+Compare JSON codec backends on shift.list-shaped payloads.
+
+  python -m benchmarks.codec_bench [--batch 1000] [--repeat 5]
+
+"""
+import argparse
+import datetime
+import timeit
+
+from shiftboard.codec import PREFERENCE, get_codec
+from benchmarks import payloads
+
+
+def available_codecs():
+    for name in PREFERENCE:
+        try:
+            yield get_codec(name)
+        except ImportError:
+            pass
+
+
+def bench(fn, repeat, number):
+    """Best time per call, in milliseconds"""
+    return min(timeit.repeat(fn, repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    response = payloads.shift_list_response(args.batch, batch=args.batch)
+    params = {
+        'select': {'workgroup': [str(200000 + n) for n in range(50)],
+                   'start_date': datetime.date(2016, 1, 1),
+                   'end_date': datetime.date(2016, 12, 31)},
+        'page': {'start': 1, 'batch': args.batch},
+        'extended': True,
+    }
+
+    print '%-12s %14s %14s %16s' % ('codec', 'decode (ms)', 'encode (ms)', 'params (us)')
+    for codec in available_codecs():
+        text = codec.dumps(response)
+        decode = bench(lambda: codec.loads(text), args.repeat, 3)
+        encode = bench(lambda: codec.dumps(response), args.repeat, 3)
+        request = bench(lambda: codec.dumps(params), args.repeat, 1000) * 1000
+        print '%-12s %14.2f %14.2f %16.1f' % (codec.name, decode, encode, request)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+"""
+In-process stand-in for the Shiftboard JSON-RPC API, for offline benchmarks.
+
+  org = FakeOrg(shifts=10000)
+  server = FakeServer(org, 'key_id', 'signature_key').start()
+  session = shiftboard.Session('key_id', 'signature_key', url=server.url)
+  ...
+  server.stop()
+
+Requests are accepted as GET query strings or POSTed JSON (single calls
+or batches), signatures are checked, lists are paged, and extended list
+calls include referenced_objects.  Records are generated on demand, so
+organizations of millions of shifts cost no memory up front.
+"""
+import BaseHTTPServer
+import SocketServer
+import hashlib
+import hmac
+import json
+import re
+import threading
+import urlparse
+import zlib
+
+from benchmarks import payloads
+
+WHITESPACE = re.compile(r'\s*')
+
+_decoder = json.JSONDecoder()
+
+
+class FakeOrg(object):
+    """A synthetic organization"""
+
+    def __init__(self, shifts=1000, accounts=None, workgroups=50, locations=20):
+        self.shifts = shifts
+        self.accounts = accounts or max(10, shifts // 20)
+        self.workgroups = workgroups
+        self.locations = locations
+        self.created = 0
+
+    def shift(self, n):
+        return payloads.shift(n, self.workgroups, self.locations, self.accounts)
+
+    def shift_ids(self, select):
+        """Indexes of the shifts matching a select"""
+        if select.get('shift') or select.get('id'):
+            ids = select.get('shift') or select.get('id')
+            ids = ids if isinstance(ids, list) else [ids]
+            return sorted(int(id) - 1000000 for id in ids
+                          if 0 < int(id) - 1000000 <= self.shifts)
+        if select.get('workgroup'):
+            offset = int(select['workgroup']) - 200000
+            first = offset or self.workgroups
+            return xrange(first, self.shifts + 1, self.workgroups)
+        return xrange(1, self.shifts + 1)
+
+    def ids(self, kind):
+        if kind == 'account':
+            return xrange(10, 10 + self.accounts)
+        if kind == 'workgroup':
+            return xrange(200000, 200000 + self.workgroups)
+        return xrange(30000, 30000 + self.locations)
+
+    def records(self, kind, select):
+        """Ids of the records of a kind matching a select, and a function
+        building each record from its id"""
+        build = getattr(payloads, kind)
+        ids = select.get(kind)
+        if ids:
+            ids = ids if isinstance(ids, list) else [ids]
+            valid = self.ids(kind)
+            return sorted(int(id) for id in ids if int(id) in valid), build
+        return self.ids(kind), build
+
+
+def page(ids, build, params, plural):
+    """Page of records, shaped like a list call's result"""
+    paging = params.get('page') or {}
+    start = max(int(paging.get('start', 1)), 1)
+    batch = int(paging.get('batch', 25))
+    records = [build(ids[idx]) for idx in xrange(start - 1, min(start - 1 + batch, len(ids)))]
+    result = {
+        'count': str(len(ids)),
+        plural: records,
+        'page': {'this': {'start': start, 'batch': batch}},
+    }
+    if start + batch <= len(ids):
+        result['page']['next'] = {'start': start + batch, 'batch': batch}
+    return result
+
+
+class Api(object):
+    """Implementation of the api methods"""
+
+    def __init__(self, org):
+        self.org = org
+        self.lock = threading.Lock()
+
+    def call(self, method, params):
+        handler = getattr(self, method.replace('.', '_'), None)
+        if handler is None:
+            raise ApiError('unknown_method', 'No such method %s' % (method,))
+        return handler(params)
+
+    def system_echo(self, params):
+        return params
+
+    def shift_list(self, params):
+        org = self.org
+        result = page(org.shift_ids(params.get('select') or {}), org.shift,
+                      params, 'shifts')
+        if params.get('extended'):
+            result['referenced_objects'] = payloads.referenced_objects(result['shifts'])
+        return result
+
+    shift_whosOn = shift_list
+
+    def shift_get(self, params):
+        n = int(params['id']) - 1000000
+        if not 0 < n <= self.org.shifts:
+            raise ApiError('no_shift', 'No such shift')
+        return {'shift': self.org.shift(n)}
+
+    def shift_create(self, params):
+        if 'start_date' not in params or 'workgroup' not in params:
+            raise ApiError('missing_param', 'start_date and workgroup are required')
+        with self.lock:
+            self.org.created += 1
+            return {'id': str(5000000 + self.org.created)}
+
+    def _list(kind, plural):
+        def handler(self, params):
+            ids, build = self.org.records(kind, params.get('select') or {})
+            return page(ids, build, params, plural)
+        return handler
+
+    account_list = _list('account', 'accounts')
+    workgroup_list = _list('workgroup', 'workgroups')
+    location_list = _list('location', 'locations')
+    del _list
+
+    def account_get(self, params):
+        return payloads.account(int(params['id']))
+
+    def account_self(self, params):
+        return payloads.account(10)
+
+    def timeclock_whosOn(self, params):
+        org = self.org
+        ids = xrange(10, 10 + max(1, org.accounts // 2))
+
+        def build(id):
+            return {
+                'account': str(id),
+                'workgroup': str(200000 + id % org.workgroups),
+                'clocked_in': '2016-01-01T%02d:%02d:00Z' % (id % 24, id % 60),
+                'clocked_out': None,
+                'shift': None,
+                'can_clockout': True,
+            }
+
+        result = page(ids, build, params, 'timeclocks')
+        if params.get('extended'):
+            timeclocks = result['timeclocks']
+            result['referenced_objects'] = {
+                'account': [payloads.account(int(t['account'])) for t in timeclocks],
+                'workgroup': [payloads.workgroup(int(id)) for id in
+                              sorted(set(t['workgroup'] for t in timeclocks))],
+            }
+        return result
+
+    def timeclock_status(self, params):
+        id = int(params['account'])
+        return {'account': str(id), 'workgroup': str(200000 + id % self.org.workgroups),
+                'clocked_in': '2016-01-01T09:00:00Z', 'clocked_out': None}
+
+
+class ApiError(Exception):
+    def __init__(self, code, message):
+        Exception.__init__(self, message)
+        self.code = code
+        self.message = message
+
+
+def raw_members(text, pos=0):
+    """(key, raw JSON text of value) for each member of a JSON object, so
+    that a signature can be checked against the exact params text"""
+    pos = WHITESPACE.match(text, pos).end()
+    if text[pos] != '{':
+        raise ValueError('Expected object')
+    pos += 1
+    while True:
+        pos = WHITESPACE.match(text, pos).end()
+        if text[pos] == '}':
+            return
+        key, pos = _decoder.raw_decode(text, pos)
+        pos = WHITESPACE.match(text, pos).end()
+        if text[pos] != ':':
+            raise ValueError('Expected :')
+        pos = WHITESPACE.match(text, pos + 1).end()
+        value, end = _decoder.raw_decode(text, pos)
+        yield key, text[pos:end]
+        pos = WHITESPACE.match(text, end).end()
+        if text[pos] == ',':
+            pos += 1
+
+
+def raw_items(text):
+    """Raw JSON text of each item of a JSON array"""
+    pos = WHITESPACE.match(text, 0).end() + 1
+    while True:
+        pos = WHITESPACE.match(text, pos).end()
+        if text[pos] == ']':
+            return
+        value, end = _decoder.raw_decode(text, pos)
+        yield text[pos:end]
+        pos = WHITESPACE.match(text, end).end()
+        if text[pos] == ',':
+            pos += 1
+
+
+def posted(text):
+    """Fields of a POSTed request, with params left as raw JSON text"""
+    return dict((key, value if key == 'params' else json.loads(value))
+                for key, value in raw_members(text))
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # write each response in one piece, rather than a packet per header
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        request = dict(urlparse.parse_qsl(urlparse.urlsplit(self.path).query))
+        if request.get('id', '').isdigit():
+            request['id'] = int(request['id'])
+        request['params'] = request.get('params', '').decode('base64') or '{}'
+        self.respond(self.server.fake.handle(request))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        fake = self.server.fake
+        if body.lstrip().startswith('['):
+            self.respond([fake.handle(posted(item)) for item in raw_items(body)])
+        else:
+            self.respond(fake.handle(posted(body)))
+
+    def respond(self, response):
+        body = json.dumps(response)
+        fake = self.server.fake
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with fake.lock:
+            fake.requests += 1
+            fake.bytes_sent += len(body)
+
+
+class _Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class FakeServer(object):
+    """HTTP server answering api calls for a FakeOrg"""
+
+    def __init__(self, org, access_key_id, signature_key, token=None):
+        self.api = Api(org)
+        self.access_key_id = access_key_id
+        self.signature_key = signature_key
+        self.token = token
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.calls = 0
+        self.bytes_sent = 0
+        self.httpd = None
+
+    def handle(self, request):
+        """Answer one JSON-RPC request, given its params as raw JSON text"""
+        with self.lock:
+            self.calls += 1
+        id = request.get('id')
+        method = request.get('method', '')
+        params = request.get('params', '{}')
+        try:
+            self.authenticate(request, method, params)
+            result = self.api.call(method, json.loads(params))
+        except ApiError, e:
+            return {'jsonrpc': '2.0', 'id': id,
+                    'error': {'code': e.code, 'data': {'message': e.message}}}
+        return {'jsonrpc': '2.0', 'id': id, 'seconds': '0.001', 'result': result}
+
+    def authenticate(self, request, method, params):
+        if request.get('access_key_id') != self.access_key_id:
+            raise ApiError('bad_access_key', 'Unknown access key')
+        command = 'method' + method + 'params' + params
+        if self.token:
+            if request.get('token') != self.token:
+                raise ApiError('bad_token', 'Invalid token')
+            command += 'token' + self.token
+        expected = hmac.HMAC(self.signature_key, command, hashlib.sha1)
+        if request.get('signature') != expected.digest().encode('base64').strip():
+            raise ApiError('bad_signature', 'Signature mismatch')
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d/servola/api/api.cgi' % (self.httpd.server_port,)
+
+    def start(self):
+        self.httpd = _Server(('127.0.0.1', 0), Handler)
+        self.httpd.fake = self
+        thread = threading.Thread(target=self.httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
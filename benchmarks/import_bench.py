@@ -0,0 +1,46 @@
+"""
+Time `import shiftboard` in a fresh interpreter, compared with loading
+every module up front as the package used to.
+
+  python -m benchmarks.import_bench [--repeat 20]
+
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+SCENARIOS = (
+    ('import shiftboard', 'import shiftboard'),
+    ('first Session', "import shiftboard; shiftboard.Session('id', 'key')"),
+    ('every module', 'import shiftboard as s; '
+                     '[getattr(s, n) for n in s.MODELS for n in s.MODELS[n]]; '
+                     's.AsyncSession'),
+)
+
+
+def time_startup(code, repeat):
+    """Best wall time, in milliseconds, to run code in a new interpreter"""
+    best = None
+    for n in range(repeat):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', code])
+        elapsed = (time.time() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    baseline = time_startup('pass', args.repeat)
+    print '%-20s %10s' % ('scenario', 'ms')
+    print '%-20s %10.1f' % ('(interpreter)', baseline)
+    for name, code in SCENARIOS:
+        print '%-20s %10.1f' % (name, time_startup(code, args.repeat) - baseline)
+
+
+if __name__ == '__main__':
+    main()
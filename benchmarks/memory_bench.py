@@ -0,0 +1,111 @@
+"""
+Memory held by a list of shifts, as Result dicts and as compact records.
+
+  python -m benchmarks.memory_bench [--shifts 100000] [--batch 1000]
+
+Pages shaped like shift.list responses (with referenced_objects, which
+are denormalized into each shift) are stored without any api calls.  For
+each representation, a fresh interpreter reports the size of the objects
+reachable from the stored records and the growth in resident memory.
+"""
+import argparse
+import gc
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks import payloads
+
+MODES = ('dict', 'compact')
+
+
+def rss_kb():
+    """Current resident memory, or the peak where that's all there is"""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize() // 1024
+    except IOError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def deep_size(roots, skip=()):
+    """Total size of the objects reachable from roots (but not through
+    those in skip), each counted once"""
+    seen = set(id(obj) for obj in skip)
+    stack = list(roots)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or obj is None:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.iterkeys())
+            stack.extend(obj.itervalues())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif hasattr(obj, 'iteritems'):
+            # compact record: its slots, and any extra fields
+            stack.extend(obj.iterkeys())
+            stack.extend(obj.itervalues())
+            if obj._extra is not None:
+                total += sys.getsizeof(obj._extra)
+        if hasattr(obj, '__dict__') and not isinstance(obj, type):
+            stack.append(obj.__dict__)
+    return total
+
+
+def measure(mode, count, batch):
+    from shiftboard.session import Session
+    from shiftboard.shift import Shifts
+
+    session = Session('bench', 'bench')
+    gc.collect()
+    before = rss_kb()
+    started = time.time()
+    shifts = Shifts(session, batch=batch, compact=(mode == 'compact'))
+    for start in xrange(1, count + 1, batch):
+        shifts.storeBatch(payloads.shift_page(count, start, batch))
+    elapsed = time.time() - started
+    gc.collect()
+    records = shifts.storage.values()
+    # (referenced objects are counted through the records sharing them)
+    retained = deep_size(records, skip=[session])
+    return {
+        'mode': mode,
+        'shifts': count,
+        'store_seconds': elapsed,
+        'retained_bytes': retained,
+        'bytes_per_shift': retained // count,
+        'rss_growth_kb': rss_kb() - before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--shifts', type=int, default=100000)
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print json.dumps(measure(args.child, args.shifts, args.batch), sort_keys=True)
+        return
+
+    print '%-8s %14s %12s %14s %10s' % ('mode', 'retained (MB)', 'bytes/shift',
+                                        'rss growth (MB)', 'store (s)')
+    for mode in MODES:
+        result = json.loads(subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.memory_bench', '--child', mode,
+             '--shifts', str(args.shifts), '--batch', str(args.batch)]))
+        print '%-8s %14.1f %12d %14.1f %10.2f' % (
+            mode, result['retained_bytes'] / 1e6, result['bytes_per_shift'],
+            result['rss_growth_kb'] / 1024.0, result['store_seconds'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Synthetic api payloads shaped like real Shiftboard responses.
+"""
+import datetime
+
+TIMEZONE = 'Pacific Time (US/Can) (GMT-08:00)'
+
+EPOCH = datetime.datetime(2016, 1, 1, 6, 0, 0)
+
+
+def shift(n, workgroups=50, locations=20, accounts=500):
+    """The nth shift of an organization, as returned by shift.list"""
+    start = EPOCH + datetime.timedelta(hours=3 * n)
+    covered = n % 5 != 0
+    return {
+        'id': str(1000000 + n),
+        'subject': 'Shift %d' % (n,),
+        'details': '',
+        'start_date': start.strftime('%Y-%m-%dT%H:%M:%S'),
+        'end_date': (start + datetime.timedelta(hours=4)).strftime('%Y-%m-%dT%H:%M:%S'),
+        'created': (start - datetime.timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'timezone': TIMEZONE,
+        'workgroup': str(200000 + n % workgroups),
+        'location': str(30000 + n % locations),
+        'covering_member': str(10 + n % accounts) if covered else None,
+        'covering_workgroup': None,
+        'covered': covered,
+        'published': True,
+        'urgent': False,
+        'no_pick_up': False,
+        'qty': '1',
+        'count': '1',
+        'reference_id': '',
+        'work_status_type': '0',
+    }
+
+
+def workgroup(id):
+    return {'id': str(id), 'name': 'Workgroup %d' % (id,), 'timezone': TIMEZONE}
+
+
+def location(id):
+    return {'id': str(id), 'name': 'Location %d' % (id,), 'city': 'Seattle'}
+
+
+def account(id):
+    return {'id': str(id), 'first_name': 'First%d' % (id,),
+            'last_name': 'Last%d' % (id,), 'screen_name': 'Member %d' % (id,)}
+
+
+def referenced_objects(shifts):
+    """referenced_objects section for a page of shifts"""
+    ids = lambda key: sorted(set(s[key] for s in shifts if s[key]))
+    return {
+        'workgroup': [workgroup(int(id)) for id in ids('workgroup')],
+        'location': [location(int(id)) for id in ids('location')],
+        'account': [account(int(id)) for id in ids('covering_member')],
+        'timezone': [{'name': TIMEZONE, 'offset': '-0800'}],
+    }
+
+
+def shift_page(count, start=1, batch=1000, referenced=True):
+    """result of a shift.list call returning one page of count shifts"""
+    shifts = [shift(n) for n in range(start, min(start + batch, count + 1))]
+    result = {
+        'count': str(count),
+        'shifts': shifts,
+        'page': {'this': {'start': start, 'batch': batch}},
+    }
+    if start + batch <= count:
+        result['page']['next'] = {'start': start + batch, 'batch': batch}
+    if referenced:
+        result['referenced_objects'] = referenced_objects(shifts)
+    return result
+
+
+def shift_list_response(count, start=1, batch=1000, id=1):
+    return {'jsonrpc': '2.0', 'id': id, 'seconds': '0.1',
+            'result': shift_page(count, start, batch)}
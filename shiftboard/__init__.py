@@ -1,6 +1,41 @@
-
-from session import Session, TokenSession
-from call import RPCError
+import shiftboard.lazy
 
 MAX_BATCH_SIZE=1000
 API_DATE_FORMAT='%Y-%m-%d'
+
+# Names are imported from their modules when first used, so that importing
+# the package stays quick.
+SUBMODULES = (
+    'account', 'asyncsession', 'availability', 'cache', 'call', 'cassette',
+    'client', 'codec', 'columns', 'compact', 'flight', 'identity',
+    'index', 'instrument', 'isodate', 'location', 'mirror', 'profile',
+    'result', 'retry', 'role', 'session', 'shift', 'stream', 'timeclock',
+    'tradeboard', 'transport', 'workgroup',
+)
+
+# API object-wrapper classes, by the module defining them
+MODELS = {
+    'account': ('Account', 'MyAccount', 'Accounts'),
+    'availability': ('Availability', 'AvailabilityList'),
+    'workgroup': ('Workgroup', 'Workgroups'),
+    'location': ('Location', 'Locations'),
+    'shift': ('Shift', 'Shifts', 'ExtendedShifts', 'WhosOnShifts'),
+    'tradeboard': ('Trade', 'Trades'),
+    'timeclock': ('Timeclock', 'WhosOnTimeclocks'),
+    'client': ('Client', 'Clients'),
+    'role': ('Role', 'Roles'),
+    'profile': ('ProfileConfiguration', 'ProfileConfigurationList',
+                'ProfileType', 'ProfileTypes', 'ProfileData', 'ProfileDataList'),
+}
+
+_lazy = dict((name, 'shiftboard.' + name) for name in SUBMODULES)
+_lazy.update((name, 'shiftboard.' + module)
+             for module, names in MODELS.iteritems() for name in names)
+_lazy.update(
+    Session='shiftboard.session',
+    TokenSession='shiftboard.session',
+    AsyncSession='shiftboard.asyncsession',
+    AsyncTokenSession='shiftboard.asyncsession',
+    RPCError='shiftboard.call',
+)
+shiftboard.lazy.install(__name__, _lazy)
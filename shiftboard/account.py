@@ -11,6 +11,8 @@ class Account(Result):
     """Represents a single account record"""
     name = 'account'
     name_plural = 'accounts'
+    fields = ('id', 'first_name', 'last_name', 'screen_name', 'profile_type',
+              'user_type')
 
     def getData(self):
         # extended = True needed to get user_type (admin, etc.).
@@ -0,0 +1,70 @@
+"""
+Sessions able to make many api calls concurrently
+
+Calls are run on a pool of worker threads, sharing the session's
+transport, and return immediately with a pending result:
+
+  session = AsyncSession(key_id, key, workers=8,
+                         transport=PooledTransport(pool_size=8))
+  pending = [session.apicall_async('shift.get', id=id) for id in ids]
+  shifts = [p.get()['result']['shift'] for p in pending]
+
+  shifts = session.Shifts(select={'workgroup': 5})
+  session.load_async(shifts).wait()
+  for shift in shifts:
+      ...
+
+"""
+from multiprocessing.pool import ThreadPool
+
+from session import Session, TokenSession
+
+WORKERS = 8
+
+
+class AsyncSession(Session):
+    """Session with non-blocking variants of apicall"""
+
+    def __init__(self, *args, **kwargs):
+        self.workers = kwargs.pop('workers', WORKERS)
+        self._pool = None
+        super(AsyncSession, self).__init__(*args, **kwargs)
+
+    @property
+    def pool(self):
+        """Worker threads, started on first use"""
+        with self.lock:
+            if self._pool is None:
+                self._pool = ThreadPool(self.workers)
+            return self._pool
+
+    def apicall_async(self, method, **kwargs):
+        """Make an API call in the background.  Returns a pending result;
+        its get() returns the response or raises the call's error."""
+        return self.pool.apply_async(self.apicall, (method,), kwargs)
+
+    def apicall_map(self, calls):
+        """Make several API calls in the background, given a list of
+        (method, params) pairs.  get() on the pending result returns the
+        list of responses, in order."""
+        return self.pool.map_async(self._apicall_pair, calls)
+
+    def _apicall_pair(self, call):
+        method, params = call
+        return self.apicall(method, **params)
+
+    def load_async(self, results):
+        """Load all records of a Results list in the background"""
+        return self.pool.apply_async(results.load_all)
+
+    def close(self):
+        with self.lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.close()
+            pool.join()
+        super(AsyncSession, self).close()
+
+
+class AsyncTokenSession(AsyncSession, TokenSession):
+    """AsyncSession authenticating using a token"""
@@ -0,0 +1,111 @@
+"""
+Caching of responses to read-only api calls.
+
+  cache = ResponseCache(ttl={'workgroup.list': 3600}, maxsize=500)
+  session = Session(key_id, key, cache=cache)
+  ...
+  print cache.stats()
+
+Cached responses are shared between callers, and should be treated as
+read-only.  A cache may be shared by several sessions: responses are kept
+apart by the key (and token) each session calls with.  List pages read
+by a session with stream=True are not cached.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# default lifetime, in seconds, of responses from slowly-changing methods
+TTL = {
+    'workgroup.list': 300,
+    'location.list': 300,
+    'role.list': 300,
+    'profileType.list': 300,
+    'profileConfiguration.list': 300,
+    'account.self': 60,
+}
+
+# methods which modify data
+WRITE_SUFFIXES = ('.create', '.update', '.delete')
+WRITE_METHODS = frozenset(['timeclock.clockIn', 'timeclock.clockOut'])
+
+# a write invalidates cached responses from its own namespace (e.g.
+# shift.delete invalidates shift.*), and from any others listed here
+INVALIDATES = {
+    'profileData.update': ('account',),
+}
+
+
+def writes(method):
+    """Does a call to this method modify data?"""
+    return method in WRITE_METHODS or method.endswith(WRITE_SUFFIXES)
+
+
+def namespace(method):
+    return method.split('.', 1)[0]
+
+
+class ResponseCache(object):
+    """Bounded LRU cache of api responses with per-method lifetimes.
+
+    ttl maps method names to seconds, defaulting to TTL; methods not in
+    it are cached for default_ttl seconds (by default, not at all).
+    """
+
+    def __init__(self, ttl=None, default_ttl=0, maxsize=1000):
+        self.ttl = TTL if ttl is None else ttl
+        self.default_ttl = default_ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def cacheable(self, method):
+        return self.ttl.get(method, self.default_ttl) > 0
+
+    def get(self, key):
+        """Look up a response, returning whether it was found and the response"""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry and entry[0] > time.time():
+                # reinsert as most recently used
+                self.entries[key] = entry
+                self.hits += 1
+                return True, entry[2]
+            self.misses += 1
+            return False, None
+
+    def put(self, method, key, response):
+        """Store a response, if the method is cacheable"""
+        ttl = self.ttl.get(method, self.default_ttl)
+        if ttl <= 0:
+            return
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (time.time() + ttl, namespace(method), response)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, method):
+        """Drop responses made stale by a call to a write method"""
+        stale = set((namespace(method),) + INVALIDATES.get(method, ()))
+        with self.lock:
+            for key, entry in self.entries.items():
+                if entry[1] in stale:
+                    del self.entries[key]
+                    self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Hit, miss and invalidation counts, and current size"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'size': len(self.entries),
+        }
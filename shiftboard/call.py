@@ -1,11 +1,15 @@
 RPCVER = '2.0'
 
+import contextlib
 import hmac
 import hashlib
 import httplib
 import urllib
-import urllib2
-import datetime
+
+from retry import idempotent
+from cache import writes
+from codec import json_serial
+from instrument import CallEvent
 
 # Different versions of Python have a different name for the JSON library.
 try:
@@ -14,20 +18,9 @@ except ImportError:
     import json
 
 
-def json_serial(obj):
-    """JSON serializer for objects not serializable by default json code"""
-
-    if isinstance(obj, datetime.datetime):
-        serial = obj.isoformat()
-        return serial
-    if isinstance(obj, datetime.date):
-        serial = obj.isoformat()
-        return serial
-    raise TypeError("Type not serializable")
-
-
-# track most recent url for debugging
+# track most recent url and transport response for debugging
 lasturl = None
+lastresponse = None
 
 LOGREQUEST = False;
 LOGRESPONSE = False;
@@ -77,10 +70,14 @@ class _ApiCallJson(object):
     """Callable class to return from session.__attr__ implementing arbitrary
     API call.  Accepts and returns json strings."""
 
-    def __init__(self, session, method):
-        """Save session attributes & method name during construction"""
+    def __init__(self, session, method, id=None):
+        """Save session attributes, method name & transaction ID during
+        construction"""
         self.session = session
         self.method = method
+        if id is None:
+            id = session.id
+        self.id = id
 
     def __call__(self, json_params):
         """Take params when called"""
@@ -105,16 +102,22 @@ class _ApiCallJson(object):
         )
 
     @property
-    def urlparts(self):
+    def envelope(self):
+        """Signed request fields, other than the params themselves"""
         return {
-            'id': self.session.id,
+            'id': self.id,
             'jsonrpc': RPCVER,
             'method': self.method,
             'access_key_id': self.session.access_key_id,
             'signature': self._b64(self.digest.digest()),
-            'params': self._b64(self.json_params),
         }
 
+    @property
+    def urlparts(self):
+        parts = self.envelope
+        parts['params'] = self._b64(self.json_params)
+        return parts
+
     @property
     def url(self):
         global lasturl
@@ -122,19 +125,71 @@ class _ApiCallJson(object):
         lasturl = url
         return url
 
+    @property
+    def body(self):
+        """JSON-RPC request object for sending as a POST body.  The signed
+        params string is spliced in verbatim rather than re-encoded, so the
+        server sees exactly the text the signature was computed over."""
+        envelope = json.dumps(self.envelope)
+        return envelope[:-1] + ', "params": ' + self.json_params + '}'
+
+    def request(self, stream=False):
+        """Send the request using the session's transport, returning a
+        StreamResponse if stream is true"""
+        transport = self.session.transport
+        send = transport.stream if stream else transport.request
+        if self.session.post:
+            return send(self.session.url, self.body,
+                        {'Content-Type': 'application/json'})
+        return send(self.url)
+
+    def send(self, stream=False):
+        """Send the request, retrying as the session allows, and check
+        the HTTP status of the response"""
+        global lastresponse
+        try:
+            response, self.retries = self.session.retry.send(
+                lambda: self.request(stream), idempotent(self.method))
+        except (httplib.HTTPException, IOError), e:
+            raise RPCClientError(1, 'Error opening %s' % self.session.url,
+                                 self.method, self.json_params)
+        if response.status >= 400:
+            response.close()
+            raise RPCClientError(1, 'Error opening %s (%d retries)' % (
+                                    self.session.url, self.retries),
+                                 self.method, self.json_params)
+        self.response = lastresponse = response
+        # for Results to size their pages by
+        self.session.local.response = response
+        return response
+
     def get_result_json(self, json_params):
         """Override from base class, using token in request"""
         self.json_params = json_params
         self.logRequest(json_params)
-        try:
-            conn = urllib2.urlopen(self.url)
-        except urllib2.HTTPError, e:
-            raise RPCClientError(1, 'Error opening %s' % self.session.url,
-                                 self.method, json_params)
-        result = conn.read()
+        result = self.send().body
         self.logResponse(result)
         return result
 
+    @contextlib.contextmanager
+    def instrumented(self):
+        """Report the call made within the block to the session's hooks"""
+        session = self.session
+        if not session.hooks:
+            yield
+            return
+        event = CallEvent(self.method, self.id, len(self.json_params))
+        session.emit('before_request', event)
+        event.start()
+        try:
+            yield
+        except Exception, e:
+            event.finish(self, e)
+            session.emit('on_error', event)
+            raise
+        event.finish(self)
+        session.emit('after_response', event)
+
     def logRequest(self, request):
         """Pretty-print the request if request logging enabled"""
         if LOGREQUEST:
@@ -145,8 +200,9 @@ class _ApiCallJson(object):
     def logResponse(self, result):
         """Pretty-print the response if response logging enabled"""
         if LOGRESPONSE:
-            log.warn('RESPONSE to %s: %s' %
-                     (self.method, self._prettify(result),))
+            log.warn('RESPONSE to %s (%d bytes, %d on the wire): %s' %
+                     (self.method, self.response.decoded_bytes,
+                      self.response.wire_bytes, self._prettify(result),))
 
     def _prettify(self, json_obj):
         """De+encode json with pretty-printing"""
@@ -160,11 +216,36 @@ class _ApiCall(_ApiCallJson):
 
     def get_result(self, params):
         # Convert date and datetime objects to serializable forms
-        json_params = json.dumps(params, default=json_serial)
-        result = self.get_result_json(json_params)
-        result = json.loads(result)
-        if 'error' in result:
-            raise RPCServerError(result['error'], self.method, params)
+        codec = self.session.codec
+        self.json_params = codec.dumps(params)
+        with self.instrumented():
+            result = self.get_result_json(self.json_params)
+            result = codec.loads(result)
+            self.seconds = result.get('seconds')
+            if 'error' in result:
+                raise RPCServerError(result['error'], self.method, params)
+        return result
+
+    def get_result_stream(self, params, key, element):
+        """Like get_result, but decodes the records of the result's key
+        list one at a time as they arrive, replacing each with
+        element(record)"""
+        from stream import decode
+
+        self.json_params = self.session.codec.dumps(params)
+        self.logRequest(self.json_params)
+        with self.instrumented():
+            response = self.send(stream=True)
+            try:
+                result = decode(response.reader, key, element)
+            except (httplib.HTTPException, IOError), e:
+                raise RPCClientError(1, 'Error reading %s' % self.session.url,
+                                     self.method, params)
+            finally:
+                response.close()
+            self.seconds = result.get('seconds')
+            if 'error' in result:
+                raise RPCServerError(result['error'], self.method, params)
         return result
 
     def __call__(self, *args, **kw):
@@ -188,7 +269,148 @@ class _ApiCallToken(_ApiCall):
         return command
 
     @property
-    def urlparts(self):
-        parts = super(_ApiCallToken, self).urlparts
+    def envelope(self):
+        parts = super(_ApiCallToken, self).envelope
         parts['token'] = self.session.token
         return parts
+
+
+class BatchCall(object):
+    """A single call within an _ApiBatch.  Its response is available from
+    result() once the batch has been sent."""
+
+    def __init__(self, handle, params):
+        self.handle = handle
+        self.params = params
+        self.response = None
+        self.error = None
+
+    @property
+    def method(self):
+        return self.handle.method
+
+    @property
+    def id(self):
+        return self.handle.id
+
+    def result(self):
+        """Return the response, or raise this call's RPCError"""
+        if self.error:
+            raise self.error
+        if self.response is None:
+            raise RPCClientError(2, 'Batch not sent yet', self.method, self.params)
+        return self.response
+
+    def __repr__(self):
+        return '<%s %s id:%s>' % (self.__class__.__name__, self.method, self.id)
+
+
+class _ApiBatch(object):
+    """Collects api calls and sends them as one JSON-RPC 2.0 batch request.
+    Each call is signed individually, and an error in one call is raised
+    only by that call's result().
+
+      with session.batch() as batch:
+          me = batch.apicall('account.self')
+          status = batch.apicall('timeclock.status', account=5)
+      print me.result()['result']['first_name']
+
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.calls = []
+        self.response = None
+
+    def apicall(self, method, **kwargs):
+        """Queue an API call, returning its BatchCall"""
+        handle = self.session.api_class(self.session, method,
+                                        self.session.nextId())
+        handle.json_params = self.session.codec.dumps(kwargs)
+        call = BatchCall(handle, kwargs)
+        self.calls.append(call)
+        return call
+
+    @property
+    def body(self):
+        return '[' + ', '.join(call.handle.body for call in self.calls) + ']'
+
+    def request(self):
+        """Send the batch using the session's transport"""
+        return self.session.transport.request(
+            self.session.url, self.body,
+            {'Content-Type': 'application/json'})
+
+    def send(self):
+        """Send queued calls, matching responses to them by id.  Each call
+        is reported to the session's hooks, with an equal share of the
+        batch's response size."""
+        session = self.session
+        calls = self.calls
+        events = []
+        if session.hooks:
+            for call in calls:
+                event = CallEvent(call.method, call.id, len(call.handle.json_params))
+                session.emit('before_request', event)
+                event.start()
+                events.append(event)
+        error = None
+        try:
+            return self._send()
+        except Exception, e:
+            error = e
+            raise
+        finally:
+            for method in set(call.method for call in calls):
+                if writes(method):
+                    session.invalidate(method)
+            for call, event in zip(calls, events):
+                event.finish(self, error or call.error)
+                if event.response_bytes is not None:
+                    event.response_bytes //= len(calls)
+                    event.wire_bytes //= len(calls)
+                session.emit('on_error' if event.error else 'after_response', event)
+
+    def _send(self):
+        global lastresponse
+        calls = self.calls
+        if not calls:
+            return calls
+        methods = [call.method for call in calls]
+        try:
+            response, self.retries = self.session.retry.send(
+                self.request, all(idempotent(method) for method in methods))
+        except (httplib.HTTPException, IOError), e:
+            raise RPCClientError(1, 'Error opening %s' % self.session.url,
+                                 'batch', methods)
+        if response.status >= 400:
+            raise RPCClientError(1, 'Error opening %s (%d retries)' % (
+                                    self.session.url, self.retries),
+                                 'batch', methods)
+        self.response = lastresponse = response
+        self.calls = []
+
+        results = self.session.codec.loads(response.body)
+        if isinstance(results, dict):
+            # the batch as a whole was rejected
+            raise RPCServerError(results['error'], 'batch', methods)
+
+        byid = dict((str(result.get('id')), result) for result in results)
+        for call in calls:
+            result = byid.get(str(call.id))
+            if result is None:
+                call.error = RPCClientError(3, 'No response in batch',
+                                            call.method, call.params)
+            elif 'error' in result:
+                call.error = RPCServerError(result['error'],
+                                            call.method, call.params)
+            else:
+                call.response = result
+        return calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.send()
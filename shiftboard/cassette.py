@@ -0,0 +1,213 @@
+"""
+Recording api traffic to a cassette file, and replaying it without a network.
+
+  session = Session(key_id, key,
+                    transport=RecordingTransport(PooledTransport(), 'job.cassette'))
+  ... run the job ...
+  session.close()
+
+  session = Session('any', 'any', transport=ReplayTransport('job.cassette'))
+  ... run it again, offline ...
+
+A cassette is a gzipped file with one JSON line per exchange.  Access key
+ids, signatures and tokens are never written to it.  A request is matched
+by its methods and params, so that a replayed job may use different call
+ids (or GET instead of POST) from the recorded one.
+"""
+import base64
+import collections
+import gzip
+import json
+import threading
+import time
+import urlparse
+from StringIO import StringIO
+
+from transport import BodyReader, Response, StreamResponse
+
+# response headers describing the recorded body's encoding, which do not
+# apply to the decoded body replayed
+DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding',
+                   'connection', 'set-cookie')
+
+
+class CassetteError(Exception):
+    """A request has no recorded response"""
+
+
+def calls(url, body=None):
+    """The JSON-RPC calls in a request, as (id, method, params) tuples"""
+    if body is None:
+        fields = dict(urlparse.parse_qsl(urlparse.urlsplit(url).query))
+        params = base64.b64decode(fields.get('params', '')) or '{}'
+        return [(fields.get('id'), fields.get('method'), json.loads(params))]
+    requests = json.loads(body)
+    if isinstance(requests, dict):
+        requests = [requests]
+    return [(r.get('id'), r.get('method'), r.get('params', {})) for r in requests]
+
+
+def request_key(url, body=None):
+    """Description of a request as stored in a cassette, and the ids of its
+    calls.  Only methods and params are kept; keys, signatures, tokens and
+    ids are left out."""
+    parsed = calls(url, body)
+    request = {
+        'batch': body is not None and body.lstrip().startswith('['),
+        'calls': [{'method': method, 'params': params}
+                  for id, method, params in parsed],
+    }
+    return request, [id for id, method, params in parsed]
+
+
+def match_key(request):
+    return json.dumps(request, sort_keys=True, separators=(',', ':'))
+
+
+class _TeeReader(object):
+    """Reader passing on another reader's body, keeping a copy"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.chunks = []
+
+    def read(self, *args):
+        chunk = self.reader.read(*args)
+        self.chunks.append(chunk)
+        return chunk
+
+    def readall(self):
+        return ''.join(iter(self.read, ''))
+
+    def __getattr__(self, name):
+        # wire_bytes, decoded_bytes and eof
+        return getattr(self.reader, name)
+
+
+class RecordingTransport(object):
+    """Transport passing requests on to another transport, and recording
+    each exchange to a cassette.  Close it (or the session using it) to
+    finish the file."""
+
+    def __init__(self, transport, path):
+        self.transport = transport
+        self.path = path
+        self.file = gzip.open(path, 'wb')
+        self.lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, url, body, response, data, elapsed):
+        request, ids = request_key(url, body)
+        entry = {
+            'request': request,
+            'ids': ids,
+            'status': response.status,
+            'headers': dict((name.lower(), value)
+                            for name, value in response.headers.items()
+                            if name.lower() not in DROPPED_HEADERS),
+            'body': data,
+            'wire_bytes': response.wire_bytes,
+            'elapsed': round(elapsed, 6),
+        }
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self.lock:
+            self.file.write(line)
+            self.recorded += 1
+
+    def request(self, url, body=None, headers={}):
+        started = time.time()
+        response = self.transport.request(url, body, headers)
+        self.record(url, body, response, response.body, time.time() - started)
+        return response
+
+    def stream(self, url, body=None, headers={}):
+        started = time.time()
+        response = self.transport.stream(url, body, headers)
+        reader = _TeeReader(response.reader)
+        release = response.release
+
+        def recording_release(eof):
+            release(eof)
+            if eof:
+                self.record(url, body, response, ''.join(reader.chunks),
+                            time.time() - started)
+
+        return StreamResponse(response.status, response.headers,
+                              reader, recording_release)
+
+    def close(self):
+        self.transport.close()
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+class ReplayTransport(object):
+    """Transport answering requests from a cassette.
+
+    Each request gets the next response recorded for the same calls; once
+    those run out, the last is repeated.  A request with none raises
+    CassetteError.  Unless latency is true, responses are returned at
+    once; otherwise each takes as long as it did when recorded.
+    """
+
+    def __init__(self, path, latency=False):
+        self.path = path
+        self.latency = latency
+        self.entries = collections.defaultdict(list)
+        self.served = collections.defaultdict(int)
+        self.lock = threading.Lock()
+        cassette = gzip.open(path, 'rb')
+        try:
+            for line in cassette:
+                entry = json.loads(line)
+                self.entries[match_key(entry['request'])].append(entry)
+        finally:
+            cassette.close()
+
+    def lookup(self, url, body):
+        """The recorded exchange for a request, and the request's call ids"""
+        request, ids = request_key(url, body)
+        key = match_key(request)
+        with self.lock:
+            entries = self.entries.get(key)
+            if not entries:
+                methods = ', '.join(call['method'] for call in request['calls'])
+                raise CassetteError('No recorded response for %s in %s' % (
+                                    methods, self.path))
+            served = self.served[key]
+            self.served[key] = served + 1
+        entry = entries[min(served, len(entries) - 1)]
+        if self.latency:
+            time.sleep(entry['elapsed'])
+        return entry, ids
+
+    @staticmethod
+    def body(entry, ids):
+        """Recorded response body, with the ids of a batch's responses
+        changed to those of the calls now being made.  (A single call's
+        response is returned as recorded; its id is not checked.)"""
+        body = entry['body'].encode('utf-8')
+        if not entry['request']['batch'] or ids == entry['ids']:
+            return body
+        responses = json.loads(body)
+        if not isinstance(responses, list):
+            return body
+        remap = dict((str(old), new) for old, new in zip(entry['ids'], ids))
+        for response in responses:
+            response['id'] = remap.get(str(response.get('id')), response.get('id'))
+        return json.dumps(responses)
+
+    def request(self, url, body=None, headers={}):
+        entry, ids = self.lookup(url, body)
+        return Response(entry['status'], dict(entry['headers']),
+                        self.body(entry, ids), entry['wire_bytes'])
+
+    def stream(self, url, body=None, headers={}):
+        entry, ids = self.lookup(url, body)
+        reader = BodyReader(StringIO(self.body(entry, ids)))
+        return StreamResponse(entry['status'], dict(entry['headers']),
+                              reader, lambda eof: None)
+
+    def close(self):
+        pass
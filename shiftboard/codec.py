@@ -0,0 +1,76 @@
+"""
+JSON codecs used to encode api requests and decode responses.
+
+Unless a session is given one, it uses the fastest backend installed:
+ujson, then simplejson, then the standard json module.
+
+  session = Session(key_id, key, codec=get_codec('simplejson'))
+
+"""
+import datetime
+
+# backends, fastest first
+PREFERENCE = ('ujson', 'simplejson', 'json')
+
+_DATES = (datetime.datetime, datetime.date)
+
+
+def json_serial(obj):
+    """JSON serializer for objects not serializable by default json code"""
+    if isinstance(obj, _DATES):
+        return obj.isoformat()
+    raise TypeError("Type not serializable")
+
+
+def _isoformat(obj):
+    """Copy of a structure with dates converted to ISO-8601 strings"""
+    if isinstance(obj, dict):
+        return dict((key, _isoformat(val)) for key, val in obj.iteritems())
+    if isinstance(obj, (list, tuple)):
+        return [_isoformat(val) for val in obj]
+    if isinstance(obj, _DATES):
+        return obj.isoformat()
+    return obj
+
+
+class Codec(object):
+    """Codec using json or a module with the same interface (simplejson).
+    These call json_serial only for values they can't encode themselves."""
+
+    def __init__(self, module):
+        self.module = module
+        self.name = module.__name__
+
+    def dumps(self, obj):
+        return self.module.dumps(obj, default=json_serial)
+
+    def loads(self, text):
+        return self.module.loads(text)
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.name)
+
+
+class UltraJsonCodec(Codec):
+    """Codec using ujson, which has no hook for unknown types, so dates in
+    params are converted up front"""
+
+    def dumps(self, obj):
+        return self.module.dumps(_isoformat(obj), escape_forward_slashes=False)
+
+
+def get_codec(name=None):
+    """Codec for the named backend, or the fastest one installed"""
+    for backend in (name,) if name else PREFERENCE:
+        try:
+            module = __import__(backend)
+        except ImportError:
+            if name:
+                raise
+            continue
+        if backend == 'ujson':
+            return UltraJsonCodec(module)
+        return Codec(module)
+
+
+default = get_codec()
@@ -0,0 +1,80 @@
+"""
+Column-wise export of Results, for analysis as arrays.
+
+  columns = session.Shifts(select=...).to_columns(
+      ['id', 'workgroup', 'start_date', 'end_date'])
+  hours = (columns['end_date'] - columns['start_date']) / numpy.timedelta64(1, 'h')
+
+With numpy installed, each column is an array: ids (including those of
+denormalized records) as int64, with MISSING_ID where there is none; dates
+as datetime64[s], with NaT where there is none; anything else as objects.
+Dates are parsed for a whole column at once.  Without numpy, columns are
+lists, with ids as ints and dates as datetimes.
+
+With frame=True a pandas DataFrame is returned instead.
+"""
+import isodate
+
+# fields holding an id, or a record denormalized from one
+ID_FIELDS = ('id', 'workgroup', 'location', 'covering_member',
+             'covering_workgroup', 'account', 'shift', 'role')
+
+# fields holding an ISO-8601 date, or date and time
+DATE_FIELDS = ('start_date', 'end_date', 'created', 'clocked_in', 'clocked_out',
+               'clocked_in_local', 'clocked_out_local')
+
+MISSING_ID = 0
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _id(value):
+    if hasattr(value, 'get'):
+        value = value.get('id')
+    return int(value) if value else MISSING_ID
+
+
+def _date(text):
+    """A date or date and time, without numpy"""
+    return isodate.parse(text) if text else None
+
+
+def datetime64(values):
+    """Array of ISO-8601 strings (or None) parsed to datetime64[s]"""
+    text = numpy.array([value or u'NaT' for value in values], dtype=unicode)
+    if not len(text):
+        return text.astype('datetime64[s]')
+    return numpy.char.rstrip(text, u'Z').astype('datetime64[s]')
+
+
+def column(values, field):
+    """Convert a field's raw values to a column"""
+    if field in ID_FIELDS:
+        ids = [_id(value) for value in values]
+        return numpy.array(ids, dtype=numpy.int64) if numpy else ids
+    if field in DATE_FIELDS:
+        return datetime64(values) if numpy else [_date(value) for value in values]
+    if numpy:
+        array = numpy.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    return values
+
+
+def to_columns(records, fields, frame=False):
+    """Columns of the named fields of records, as a dict of arrays (or
+    lists), or as a DataFrame"""
+    raw = dict((field, []) for field in fields)
+    for record in records:
+        get = record.get
+        for field in fields:
+            raw[field].append(get(field))
+    columns = dict((field, column(raw.pop(field), field)) for field in fields)
+    if frame:
+        import pandas
+
+        return pandas.DataFrame(columns, columns=list(fields))
+    return columns
@@ -0,0 +1,218 @@
+"""
+Compact records: a memory-saving alternative to Result's dict storage.
+
+  shifts = session.Shifts(select=..., compact=True)
+
+Records in a compact list (and the records denormalized into them) are
+instances of a class generated from the list's child class.  The fields
+named in the child's `fields` are held in __slots__, with any others in a
+small dict kept only if needed, and the child's methods are borrowed, so
+records are used just as a dict-based Result would be:
+
+  shift['start_date'], shift.get('covering_member'), shift.startDate()
+
+Compact records are not dicts, though, and methods calling super() are
+not borrowed (so e.g. creating a shift needs a Shift).
+"""
+import threading
+
+MISSING = object()
+
+NO_ARGS = {}
+
+# compact class generated for each Result class
+_classes = dict()
+_lock = threading.Lock()
+
+
+class CompactRecord(object):
+    """Dict-like record storing known fields in slots"""
+
+    __slots__ = ('session', 'loaded', 'reqargs', '_extra')
+
+    # field name -> slot name, and (field, slot) pairs in order, set for
+    # each generated class
+    _slots = {}
+    _fields = ()
+
+    def __new__(cls, *args, **kwargs):
+        self = object.__new__(cls)
+        self.loaded = False
+        self.reqargs = NO_ARGS
+        self._extra = None
+        return self
+
+    def __init__(self, session, seed=None, id=None, **reqargs):
+        self.session = session
+        if reqargs:
+            self.reqargs = reqargs
+        if seed:
+            self.update(seed)
+        if id:
+            self['id'] = id
+            self.load()
+
+    def related(self, cls, seed):
+        """A record of another class referenced by this one, shared with
+        other records referring to it"""
+        cls = compact_class(cls)
+        return self.session.identities.intern(
+            cls, seed, lambda seed: cls(self.session, seed=seed))
+
+    def __getitem__(self, key):
+        slot = self._slots.get(key)
+        if slot is not None:
+            value = getattr(self, slot, MISSING)
+            if value is not MISSING:
+                return value
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        slot = self._slots.get(key)
+        if slot is not None:
+            setattr(self, slot, value)
+        else:
+            if self._extra is None:
+                self._extra = dict()
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        slot = self._slots.get(key)
+        try:
+            if slot is not None:
+                delattr(self, slot)
+            elif self._extra is not None:
+                del self._extra[key]
+            else:
+                raise KeyError(key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.get(key, MISSING) is not MISSING
+
+    has_key = __contains__
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = default
+            return default
+
+    def pop(self, key, *default):
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+    def update(self, *args, **kwargs):
+        slots = self._slots
+        for other in args + (kwargs,):
+            items = other.iteritems() if hasattr(other, 'iteritems') else other
+            for key, value in items:
+                slot = slots.get(key)
+                if slot is not None:
+                    setattr(self, slot, value)
+                else:
+                    self[key] = value
+
+    def iteritems(self):
+        for key, slot in self._fields:
+            value = getattr(self, slot, MISSING)
+            if value is not MISSING:
+                yield key, value
+        if self._extra:
+            for item in self._extra.iteritems():
+                yield item
+
+    def iterkeys(self):
+        for key, value in self.iteritems():
+            yield key
+
+    def itervalues(self):
+        for key, value in self.iteritems():
+            yield value
+
+    __iter__ = iterkeys
+
+    def items(self):
+        return list(self.iteritems())
+
+    def keys(self):
+        return list(self.iterkeys())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def __len__(self):
+        return sum(1 for key in self.iterkeys())
+
+    def clear(self):
+        for key in self.keys():
+            del self[key]
+
+    def copy(self):
+        """The fields, as a plain dict"""
+        return dict(self.iteritems())
+
+    to_dict = copy
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.copy())
+
+
+def _borrowable(name, value):
+    if name in ('__dict__', '__weakref__', '__module__'):
+        return False
+    if name in CompactRecord.__dict__ and name != '__init__':
+        return False
+    code = getattr(value, 'func_code', None)
+    # a method calling super() needs an instance of its own class
+    return not (code and 'super' in code.co_names)
+
+
+def compact_class(cls):
+    """The compact record class for a Result class"""
+    compact = _classes.get(cls)
+    if compact is not None:
+        return compact
+
+    attrs = dict()
+    for base in reversed(cls.__mro__):
+        if base in (dict, object):
+            continue
+        for name, value in base.__dict__.iteritems():
+            if _borrowable(name, value):
+                attrs[name] = value
+            else:
+                # don't fall back on a base class's version either
+                attrs.pop(name, None)
+
+    fields = tuple(getattr(cls, 'fields', ()))
+    slots = tuple('_%d' % (n,) for n in range(len(fields)))
+    attrs.update(
+        __slots__=slots,
+        __module__=cls.__module__,
+        _slots=dict(zip(fields, slots)),
+        _fields=tuple(zip(fields, slots)),
+        full_class=cls,
+    )
+    with _lock:
+        compact = _classes.get(cls)
+        if compact is None:
+            compact = _classes[cls] = type(
+                'Compact' + cls.__name__, (CompactRecord,), attrs)
+    return compact
@@ -0,0 +1,60 @@
+"""
+Coalescing identical api calls made concurrently from several threads.
+"""
+import sys
+import threading
+
+from call import json, json_serial
+
+
+def callkey(method, params):
+    """Canonical key for a call: the method plus its sorted JSON params"""
+    return method + json.dumps(params, sort_keys=True, default=json_serial)
+
+
+class _Flight(object):
+    """A call in progress"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """While a call for some key is in flight, other callers asking for the
+    same key wait for it and share its result (or its error) instead of
+    making the call themselves.  Note that waiting callers all receive the
+    very same result object."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = dict()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Return fn(), or the result of an identical call in flight"""
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error[0], flight.error[1], flight.error[2]
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except:
+            flight.error = sys.exc_info()
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result
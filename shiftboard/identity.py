@@ -0,0 +1,57 @@
+"""
+Identity map of the objects records refer to (their workgroups, locations,
+accounts and so on), so that each referenced entity is built once per
+session and shared by every record referring to it, on whatever page of
+whichever list:
+
+  shifts = session.Shifts(select=...)
+  shifts[0]['workgroup'] is shifts[500]['workgroup']    # when the same
+
+Objects are keyed by their type (the class built, or for plain dicts the
+name the api gives them) and id.  The first seen for an entity is kept,
+updated from each later seed, so that newer responses correct what was
+known before; the map is emptied when the session calls a method that
+modifies data.
+"""
+
+
+class IdentityMap(object):
+    """Objects by (type, id)"""
+
+    def __init__(self):
+        self.objects = dict()
+
+    def intern(self, kind, seed, build=None):
+        """The object for the entity seed describes: build(seed) (or seed
+        itself) the first time, and the same object thereafter, updated
+        with the fields of seed.  Seeds without an id are not interned."""
+        ident = seed.get('id')
+        if ident is None:
+            return build(seed) if build else seed
+        key = (kind, ident)
+        obj = self.objects.get(key)
+        if obj is None:
+            # (another thread may have got there first)
+            obj = self.objects.setdefault(key, build(seed) if build else seed)
+        if obj is not seed:
+            obj.update(seed)
+        return obj
+
+    def clear(self):
+        self.objects.clear()
+
+    def __len__(self):
+        return len(self.objects)
+
+
+def referenced_index(referenced):
+    """Index a response's referenced_objects by type and then by their most
+    likely unique key"""
+    objidx = dict()
+    for objname, objarr in referenced.iteritems():
+        for robj in objarr:
+            if 'id' in robj:
+                objidx.setdefault(objname, dict())[robj['id']] = robj
+            elif 'name' in robj:
+                objidx.setdefault(objname, dict())[robj['name']] = robj
+    return objidx
@@ -0,0 +1,148 @@
+"""
+Secondary indexes over the records of a Results list, for repeated
+filtering without scanning every record.
+
+  shifts = session.ExtendedShifts(select=...)
+  index = shifts.index()
+  index.where(workgroup='130815', covered=False,
+              between=(datetime.date(2016, 1, 1), datetime.date(2016, 2, 1)))
+
+Hashed fields are looked up by value; a denormalized record is indexed by
+its id.  The ordered field (start_date) is kept sorted, for range queries.
+The index is updated as the list stores more pages, and forgets records a
+list limited by max_pages or max_bytes evicts.
+"""
+import bisect
+import datetime
+
+import isodate
+
+# fields indexed by value, by default
+HASHED = ('id', 'workgroup', 'location', 'covering_member', 'covering_workgroup',
+          'covered', 'role')
+
+# field kept sorted, by default
+ORDERED = 'start_date'
+
+
+def key(value):
+    """What a field value is indexed by"""
+    if value is None or isinstance(value, basestring):
+        return value
+    if hasattr(value, 'get'):
+        # denormalized record
+        return value.get('id')
+    if isinstance(value, (int, long)) and not isinstance(value, bool):
+        # ids are strings in api responses
+        return str(value)
+    return value
+
+
+def _bound(value):
+    """A range bound as a datetime"""
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    return isodate.parse(value)
+
+
+class Index(object):
+    """Hash indexes on some fields of a list's records, and a sorted index
+    on one more.  Records are identified by their position in the list."""
+
+    def __init__(self, results, hashed=HASHED, ordered=ORDERED):
+        self.results = results
+        self.hashed = tuple(hashed)
+        self.ordered = ordered
+        # field -> value -> positions (lists, which are smaller than sets)
+        self.hashes = dict((field, dict()) for field in self.hashed)
+        # (value of ordered field, position), sorted
+        self.order = []
+        self.records = dict()
+        for idx, record in results.storage.items():
+            self.add(idx, record)
+        results.listen(self.add)
+
+    def add(self, idx, record):
+        """Index the record stored at a position (None if it was evicted)"""
+        if idx in self.records:
+            self.remove(idx)
+        if record is None:
+            return
+        self.records[idx] = record
+        for field in self.hashed:
+            value = key(record.get(field))
+            try:
+                positions = self.hashes[field].get(value)
+                if positions is None:
+                    self.hashes[field][value] = [idx]
+                else:
+                    positions.append(idx)
+            except TypeError:
+                # unhashable; found only by scanning
+                pass
+        if self.ordered and record.get(self.ordered):
+            bisect.insort(self.order, (isodate.parse(record[self.ordered]), idx))
+
+    def remove(self, idx):
+        record = self.records.pop(idx)
+        for field in self.hashed:
+            try:
+                positions = self.hashes[field].get(key(record.get(field)))
+            except TypeError:
+                continue
+            if positions:
+                positions.remove(idx)
+        if self.ordered and record.get(self.ordered):
+            entry = (isodate.parse(record[self.ordered]), idx)
+            pos = bisect.bisect_left(self.order, entry)
+            if pos < len(self.order) and self.order[pos] == entry:
+                del self.order[pos]
+
+    def positions(self, between=None, **conditions):
+        """Sorted positions of the records matching a query (see where)"""
+        candidates = []
+        scanned = dict()
+        for field, values in conditions.iteritems():
+            if not isinstance(values, (list, tuple, set, frozenset)):
+                values = (values,)
+            values = set(key(value) for value in values)
+            if field in self.hashes:
+                index = self.hashes[field]
+                matches = set()
+                for value in values:
+                    matches.update(index.get(value, ()))
+                candidates.append(matches)
+            else:
+                scanned[field] = values
+        if between:
+            start, end = _bound(between[0]), _bound(between[1])
+            lo = 0 if start is None else bisect.bisect_left(self.order, (start,))
+            hi = len(self.order) if end is None else bisect.bisect_left(self.order, (end,))
+            candidates.append(set(idx for value, idx in self.order[lo:hi]))
+
+        if candidates:
+            candidates.sort(key=len)
+            found = candidates[0].intersection(*candidates[1:])
+        else:
+            found = self.records.viewkeys()
+        records = self.records
+        for field, values in scanned.iteritems():
+            found = [idx for idx in found if key(records[idx].get(field)) in values]
+        return sorted(found)
+
+    def where(self, between=None, **conditions):
+        """Records having each field given equal to its value (or to any of
+        a list of values), in list order.  between=(start, end) selects
+        those whose ordered field falls in [start, end), either end being
+        None for no limit; bounds may be datetimes, dates or ISO strings."""
+        records = self.records
+        return [records[idx] for idx in self.positions(between, **conditions)]
+
+    def count(self, between=None, **conditions):
+        return len(self.positions(between, **conditions))
+
+    def close(self):
+        """Stop following changes to the list"""
+        self.results.unlisten(self.add)
@@ -0,0 +1,169 @@
+"""
+Instrumentation of api calls.
+
+Functions registered with Session.on() are called with a CallEvent for
+each call: 'before_request' as it is sent, then 'after_response' or
+'on_error' once it completes.  CallStats aggregates these into
+per-method counts, sizes and latency percentiles:
+
+  stats = CallStats().attach(session)
+  ...
+  print stats.export()
+
+"""
+import json
+import math
+import threading
+import time
+
+EVENTS = ('before_request', 'after_response', 'on_error')
+
+# latency histogram buckets grow by this factor (about 19%)
+BUCKET_GROWTH = 2 ** 0.25
+
+# smallest latency distinguished by histograms, in seconds
+BUCKET_MIN = 0.001
+
+
+class CallEvent(object):
+    """What is known about an api call"""
+
+    def __init__(self, method, id, params_bytes):
+        self.method = method
+        self.id = id
+        self.params_bytes = params_bytes
+        self.response_bytes = None
+        self.wire_bytes = None
+        self.elapsed = None
+        self.server_seconds = None
+        self.retries = 0
+        self.error = None
+
+    def start(self):
+        self.started = time.time()
+
+    def finish(self, handle, error=None):
+        """Record the outcome of a call made through an api handle"""
+        self.elapsed = time.time() - self.started
+        self.error = error
+        self.retries = getattr(handle, 'retries', 0)
+        response = getattr(handle, 'response', None)
+        if response is not None:
+            self.response_bytes = response.decoded_bytes
+            self.wire_bytes = response.wire_bytes
+        self.server_seconds = getattr(handle, 'seconds', None)
+
+    def __repr__(self):
+        return '<%s %s id:%s %s>' % (
+            self.__class__.__name__, self.method, self.id,
+            'error' if self.error else '%.3fs' % (self.elapsed or 0,))
+
+
+class Histogram(object):
+    """Log-scale histogram of latencies, giving approximate percentiles"""
+
+    def __init__(self):
+        self.buckets = dict()
+        self.count = 0
+
+    @staticmethod
+    def bucket(value):
+        if value <= BUCKET_MIN:
+            return 0
+        return int(math.ceil(math.log(value / BUCKET_MIN, BUCKET_GROWTH)))
+
+    def add(self, value):
+        bucket = self.bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct'th percentile"""
+        if not self.count:
+            return None
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return BUCKET_MIN * BUCKET_GROWTH ** bucket
+        return None
+
+
+class MethodStats(object):
+    """Totals for the calls to one method"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.params_bytes = 0
+        self.response_bytes = 0
+        self.wire_bytes = 0
+        self.seconds = 0.0
+        self.server_seconds = 0.0
+        self.latency = Histogram()
+
+    def add(self, event):
+        self.calls += 1
+        self.retries += event.retries
+        self.params_bytes += event.params_bytes
+        if event.error:
+            self.errors += 1
+        self.response_bytes += event.response_bytes or 0
+        self.wire_bytes += event.wire_bytes or 0
+        if event.elapsed is not None:
+            self.seconds += event.elapsed
+            self.latency.add(event.elapsed)
+        if event.server_seconds:
+            self.server_seconds += float(event.server_seconds)
+
+    def snapshot(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'params_bytes': self.params_bytes,
+            'response_bytes': self.response_bytes,
+            'wire_bytes': self.wire_bytes,
+            'seconds': self.seconds,
+            'server_seconds': self.server_seconds,
+            'p50': self.latency.percentile(50),
+            'p95': self.latency.percentile(95),
+            'p99': self.latency.percentile(99),
+        }
+
+
+class CallStats(object):
+    """Aggregates call events into per-method statistics"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.methods = dict()
+
+    def attach(self, session):
+        """Collect statistics for calls made by a session"""
+        session.on('after_response', self.record)
+        session.on('on_error', self.record)
+        return self
+
+    def record(self, event):
+        with self.lock:
+            stats = self.methods.get(event.method)
+            if stats is None:
+                stats = self.methods[event.method] = MethodStats()
+            stats.add(event)
+
+    def snapshot(self):
+        """Statistics so far, as a dict keyed by method"""
+        with self.lock:
+            return dict((method, stats.snapshot())
+                        for method, stats in self.methods.iteritems())
+
+    def export(self):
+        """Statistics so far, as JSON"""
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def reset(self):
+        with self.lock:
+            self.methods = dict()
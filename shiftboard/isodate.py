@@ -0,0 +1,55 @@
+"""
+Fast parsing of the fixed ISO-8601 formats the api uses for dates:
+
+  2016-01-01            (all-day shifts)
+  2016-01-01T09:00:00   (local times)
+  2016-01-01T17:00:00Z  (UTC times)
+
+Parsed values are cached by their text, so rendering the same shifts
+again, or many shifts starting at the same times, parses each date once.
+"""
+import datetime
+import time
+
+# most distinct strings cached before the cache is emptied
+CACHE_SIZE = 10000
+
+_cache = dict()
+
+
+def _parse(text):
+    t = text[:-1] if text.endswith('Z') else text
+    if len(t) == 10 and t[4] == t[7] == '-':
+        return datetime.datetime(int(t[0:4]), int(t[5:7]), int(t[8:10]))
+    if (len(t) == 19 and t[4] == t[7] == '-' and t[10] == 'T' and
+            t[13] == t[16] == ':'):
+        return datetime.datetime(int(t[0:4]), int(t[5:7]), int(t[8:10]),
+                                 int(t[11:13]), int(t[14:16]), int(t[17:19]))
+    raise ValueError('Not an ISO-8601 date: %r' % (text,))
+
+
+def parse(text):
+    """Parse a date, or a date and time, to a datetime"""
+    try:
+        return _cache[text]
+    except KeyError:
+        pass
+    value = _parse(text)
+    if len(_cache) >= CACHE_SIZE:
+        _cache.clear()
+    _cache[text] = value
+    return value
+
+
+def parse_datetime(text):
+    """Parse a date and time, raising ValueError for a date alone"""
+    if len(text) < 19:
+        raise ValueError('No time in %r' % (text,))
+    return parse(text)
+
+
+def utc_offset():
+    """Local time less UTC, right now"""
+    if time.localtime().tm_isdst > 0:
+        return datetime.timedelta(seconds=-time.altzone)
+    return datetime.timedelta(seconds=-time.timezone)
@@ -0,0 +1,58 @@
+"""
+Deferred imports, keeping `import shiftboard` cheap.
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module, importing the modules providing some of its
+    names only when those names are first used.
+
+    lazy maps each name to the module providing it; a name which is the
+    last component of its module's name (e.g. 'shift' for
+    'shiftboard.shift') stands for the module itself.
+
+    Names set or deleted on the stand-in are also set or deleted in the
+    original module, whose functions see its own globals; so patching
+    (as with mock.patch) works through either.
+    """
+
+    def __init__(self, module, lazy):
+        super(LazyModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        self.__dict__['_LazyModule__lazy'] = lazy
+        # keep the original module alive; python 2 clears a module's
+        # globals when it is garbage collected
+        self.__dict__['_LazyModule__module'] = module
+
+    def __getattr__(self, name):
+        try:
+            modname = self.__lazy[name]
+        except KeyError:
+            raise AttributeError("'module' object has no attribute '%s'" % (name,))
+        module = importlib.import_module(modname)
+        if modname.rsplit('.', 1)[-1] == name:
+            value = module
+        else:
+            value = getattr(module, name)
+        setattr(self, name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        setattr(self.__module, name, value)
+        super(LazyModule, self).__setattr__(name, value)
+
+    def __delattr__(self, name):
+        if name in self.__module.__dict__:
+            delattr(self.__module, name)
+        super(LazyModule, self).__delattr__(name)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self.__lazy))
+
+
+def install(name, lazy):
+    """Replace a module, as registered in sys.modules, with a LazyModule"""
+    sys.modules[name] = LazyModule(sys.modules[name], lazy)
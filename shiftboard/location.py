@@ -7,6 +7,7 @@ class Location(Result):
     """Represents a single location"""
     name = 'location'
     name_plural = 'locations'
+    fields = ('id', 'name', 'address', 'city', 'state', 'zip')
 
 class Locations(Results):
     """Represents multiple locations"""
@@ -0,0 +1,282 @@
+"""
+Local SQLite mirror of shifts, accounts, workgroups and locations.
+
+  mirror = Mirror(session, 'shiftboard.db')
+  mirror.sync(start=datetime.date(2016, 1, 1), end=datetime.date(2016, 12, 31))
+
+  for shift in mirror.Shifts(select={'workgroup': '5'}):
+      ...
+
+The first sync loads everything.  Later syncs list accounts, workgroups
+and locations again but only rewrite rows whose content hash changed,
+and list shifts one date window at a time, skipping windows which were
+synced before and ended more than LOOKBACK_DAYS ago.  Records no longer
+returned by the API are marked deleted.
+"""
+import datetime
+import hashlib
+import sqlite3
+import threading
+
+import shiftboard
+from call import json
+from result import Results, RECORD_TYPES
+from shift import Shifts
+from account import Accounts
+from workgroup import Workgroups
+from location import Locations
+
+# mirrored record types, by name
+KINDS = {
+    'shift': Shifts,
+    'account': Accounts,
+    'workgroup': Workgroups,
+    'location': Locations,
+}
+
+# days per date window when syncing shifts
+WINDOW_DAYS = 7
+
+# windows ending this many days ago or later are always synced again
+LOOKBACK_DAYS = 7
+
+# record fields copied to indexed columns, for selects on the mirror
+COLUMNS = ('start_date', 'workgroup', 'location', 'covering_member')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    start_date TEXT,
+    workgroup TEXT,
+    location TEXT,
+    covering_member TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    synced TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS records_start ON records (kind, deleted, start_date);
+CREATE INDEX IF NOT EXISTS records_workgroup ON records (kind, workgroup);
+CREATE TABLE IF NOT EXISTS windows (
+    start_date TEXT PRIMARY KEY,
+    end_date TEXT NOT NULL,
+    synced TEXT NOT NULL
+);
+"""
+
+
+def _column(value):
+    """Indexed column value: an id, whether or not the field is denormalized"""
+    if isinstance(value, RECORD_TYPES):
+        value = value.get('id')
+    if value is None:
+        return None
+    return unicode(value)
+
+
+def _hash(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True)).hexdigest()
+
+
+class Mirror(object):
+    """SQLite store mirroring Shiftboard records, with incremental sync"""
+
+    def __init__(self, session, path=':memory:'):
+        self.session = session
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def fetch(self, kind, select={}):
+        """Page through the raw records of a kind from the API"""
+        results = KINDS[kind](self.session, select=select,
+                              batch=shiftboard.MAX_BATCH_SIZE)
+        plural = results.child.name_plural
+        start = 1
+        while True:
+            obj = results.getData({'start': start})['result']
+            records = obj.get(plural) or []
+            for record in records:
+                yield record
+            start += len(records)
+            if not records or start > int(obj['count']):
+                break
+
+    def store(self, kind, records, where='', args=()):
+        """Upsert records of a kind, marking rows matched by the where
+        clause but not among the records as deleted.  Returns counts.
+
+        records may be fetched as they are iterated over: the mirror is
+        locked only to write each MAX_BATCH_SIZE of them, and to mark
+        deletions once they are all stored."""
+        now = datetime.datetime.utcnow().isoformat()
+        stats = dict(added=0, updated=0, unchanged=0, deleted=0)
+        with self.lock:
+            known = dict(self.db.execute(
+                'SELECT id, hash FROM records WHERE kind = ? AND deleted = 0 ' + where,
+                (kind,) + tuple(args)))
+        seen = set()
+        page = []
+        for record in records:
+            page.append(record)
+            if len(page) >= shiftboard.MAX_BATCH_SIZE:
+                self.upsert(kind, page, known, seen, stats, now)
+                page = []
+        self.upsert(kind, page, known, seen, stats, now)
+        with self.lock:
+            gone = [(kind, id) for id in known if id not in seen]
+            self.db.executemany(
+                'UPDATE records SET deleted = 1 WHERE kind = ? AND id = ?', gone)
+            stats['deleted'] = len(gone)
+            self.db.commit()
+        return stats
+
+    def upsert(self, kind, records, known, seen, stats, now):
+        """Write the records which have changed from the known hashes"""
+        if not records:
+            return
+        with self.lock:
+            db = self.db
+            for record in records:
+                id = unicode(record['id'])
+                seen.add(id)
+                digest = _hash(record)
+                if known.get(id) == digest:
+                    stats['unchanged'] += 1
+                    continue
+                stats['updated' if id in known else 'added'] += 1
+                db.execute(
+                    'INSERT OR REPLACE INTO records '
+                    '(kind, id, hash, data, %s, deleted, synced) '
+                    'VALUES (?, ?, ?, ?, %s, 0, ?)' % (
+                        ', '.join(COLUMNS), ', '.join('?' * len(COLUMNS))),
+                    (kind, id, digest, json.dumps(record)) +
+                    tuple(_column(record.get(c)) for c in COLUMNS) + (now,))
+            db.commit()
+
+    def syncKind(self, kind):
+        """Mirror every record of a kind"""
+        return self.store(kind, self.fetch(kind))
+
+    def syncWindow(self, start, end):
+        """Mirror shifts starting on dates from start to end, inclusive"""
+        records = self.fetch('shift', {
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+        })
+        stats = self.store(
+            'shift', records, 'AND start_date >= ? AND start_date < ?',
+            (start.isoformat(), (end + datetime.timedelta(days=1)).isoformat()))
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO windows VALUES (?, ?, ?)',
+                (start.isoformat(), end.isoformat(),
+                 datetime.datetime.utcnow().isoformat()))
+            self.db.commit()
+        return stats
+
+    def sync(self, start=None, end=None, kinds=KINDS, full=False,
+             window=WINDOW_DAYS):
+        """Bring the mirror up to date, including shifts from start to end
+        (dates).  Returns counts of added, updated, unchanged and deleted
+        records, by kind."""
+        stats = dict()
+        for kind in kinds:
+            if kind != 'shift':
+                stats[kind] = self.syncKind(kind)
+        if 'shift' not in kinds or not (start and end):
+            return stats
+
+        settled = datetime.date.today() - datetime.timedelta(days=LOOKBACK_DAYS)
+        synced = set(row[0] for row in self.db.execute(
+            'SELECT start_date FROM windows'))
+        total = dict(added=0, updated=0, unchanged=0, deleted=0, skipped=0)
+        while start <= end:
+            until = min(end, start + datetime.timedelta(days=window - 1))
+            if not full and until < settled and start.isoformat() in synced:
+                total['skipped'] += 1
+            else:
+                for key, count in self.syncWindow(start, until).items():
+                    total[key] += count
+            start = until + datetime.timedelta(days=1)
+        stats['shift'] = total
+        return stats
+
+    def query(self, kind, select={}, start=1, batch=shiftboard.MAX_BATCH_SIZE):
+        """Read one page of mirrored records, shaped like a list response.
+        select may use the id and indexed fields, with start_date and
+        end_date giving a range of dates."""
+        where = ['kind = ?', 'deleted = 0']
+        args = [kind]
+        for key, value in select.items():
+            if key == 'start_date':
+                where.append('start_date >= ?')
+            elif key == 'end_date':
+                where.append('start_date < ?')
+                value = (datetime.datetime.strptime(value[:10], shiftboard.API_DATE_FORMAT) +
+                         datetime.timedelta(days=1)).date().isoformat()
+            elif key == kind or key == 'id' or key in COLUMNS:
+                column = 'id' if key == kind else key
+                if isinstance(value, (list, tuple, set)):
+                    values = [_column(v) for v in value]
+                    where.append('%s IN (%s)' % (column, ', '.join('?' * len(values))))
+                    args.extend(values)
+                    continue
+                where.append('%s = ?' % (column,))
+                value = _column(value)
+            else:
+                raise ValueError('cannot select %s on mirrored %s' % (key, kind))
+            args.append(value)
+        where = ' AND '.join(where)
+        order = 'start_date, id' if kind == 'shift' else 'CAST(id AS INTEGER)'
+        start = max(start, 1)
+
+        with self.lock:
+            count = self.db.execute(
+                'SELECT COUNT(*) FROM records WHERE ' + where, args).fetchone()[0]
+            rows = self.db.execute(
+                'SELECT data FROM records WHERE %s ORDER BY %s LIMIT ? OFFSET ?' % (
+                    where, order), args + [batch, start - 1]).fetchall()
+        return {
+            'result': {
+                'count': count,
+                KINDS[kind].child.name_plural: [json.loads(row[0]) for row in rows],
+                'page': {'this': {'start': start, 'batch': batch}},
+            }
+        }
+
+    def results(self, kind, select={}, batch=shiftboard.MAX_BATCH_SIZE):
+        """Results list over the mirrored records of a kind"""
+        return MirrorResults(self, kind, select=select, batch=batch)
+
+    def Shifts(self, select={}, **kwargs):
+        return self.results('shift', select, **kwargs)
+
+    def Accounts(self, select={}, **kwargs):
+        return self.results('account', select, **kwargs)
+
+    def Workgroups(self, select={}, **kwargs):
+        return self.results('workgroup', select, **kwargs)
+
+    def Locations(self, select={}, **kwargs):
+        return self.results('location', select, **kwargs)
+
+    def close(self):
+        self.db.close()
+
+
+class MirrorResults(Results):
+    """Results read from a Mirror instead of the API"""
+
+    def __init__(self, mirror, kind, select={}, batch=shiftboard.MAX_BATCH_SIZE):
+        super(MirrorResults, self).__init__(mirror.session, select=select,
+                                            batch=batch)
+        self.mirror = mirror
+        self.kind = kind
+        self.child = KINDS[kind].child
+
+    def getData(self, page={}):
+        return self.mirror.query(self.kind, self.select,
+                                 page.get('start', 1), page.get('batch', self.batch))
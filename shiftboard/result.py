@@ -1,4 +1,31 @@
+import collections
+import sys
+import time
+
 import shiftboard
+from compact import CompactRecord, compact_class
+from identity import referenced_index
+
+# default number of threads used to fetch pages in parallel
+WORKERS = 4
+
+# adaptive Results resize their batches aiming for pages which take about
+# this long to fetch...
+TARGET_PAGE_SECONDS = 1.0
+
+# ...and are no larger than this
+MAX_PAGE_BYTES = 4 * 1024 * 1024
+
+# types of records, and of denormalized values
+RECORD_TYPES = (dict, CompactRecord)
+
+
+def _size(record):
+    """Rough size of a record in bytes: itself, its keys and their values"""
+    size = sys.getsizeof(record)
+    for key, value in record.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
 
 
 class Result(dict):
@@ -41,6 +68,12 @@ class Result(dict):
     def __eq__(self, other):
         return self.__class__ == other.__class__ and hash(self) == hash(other)
 
+    def related(self, cls, seed):
+        """A record of another class referenced by this one, shared with
+        other records referring to it (see shiftboard.identity)"""
+        return self.session.identities.intern(
+            cls, seed, lambda seed: cls(self.session, seed=seed))
+
     def denormalizeReferenced(self, objects):
         """Denormalize, building lightweight versions of referenced data"""
         self.denormalizeLight(objects, 'timezone')
@@ -61,29 +94,120 @@ class Result(dict):
             obj = objects[obj_name][self[key]]
             if cls:
                 # higher level object
-                self[key] = cls(self.session, seed=obj)
+                self[key] = self.related(cls, obj)
             else:
                 # simple dict
-                self[key] = obj
+                self[key] = self.session.identities.intern(obj_name, obj)
 
 
 class Results(object):
-    """Base class for multi-record api responses"""
-
-    def __init__(self, session, select={}, batch=25, **reqargs):
+    """Base class for multi-record api responses.
+
+    With compact=True, records are stored as compact records (see
+    shiftboard.compact) rather than as instances of child.
+
+    Pages are fetched aligned to the batch size.  With adaptive=True, the
+    batch size is adjusted after each page (up to MAX_BATCH_SIZE) towards
+    pages taking TARGET_PAGE_SECONDS to fetch and holding no more than
+    MAX_PAGE_BYTES; as the pages asked for then depend on how quickly they
+    arrive, this is best left off where calls are cached or recorded.  With readahead=n, iterating
+    fetches up to n pages ahead in the background.
+
+    With keep=False, iterating (and so getAllValues) streams records
+    through a page at a time without storing them; see stream().
+
+    With max_pages or max_bytes (as estimated from the records), the least
+    recently used pages are evicted from storage to stay within the limit,
+    and fetched again if they are wanted again; evictions and refetches
+    count the pages evicted and fetched again.
+    """
+
+    def __init__(self, session, select={}, batch=25, compact=False,
+                 adaptive=False, readahead=0, keep=True, max_pages=None,
+                 max_bytes=None, **reqargs):
         self.storage = dict()
         self.session = session
         self.select = select
         self.batch = batch
+        self.compact = compact
+        self.adaptive = adaptive
+        self.readahead = readahead
+        self.keep = keep
         self.reqargs = reqargs
+        # functions called with (position, record) for each record stored
+        self.listeners = []
+
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.evictions = self.refetches = 0
+        if max_pages or max_bytes:
+            # serial number -> [positions, estimated bytes per record] of
+            # the stored pages, least recently used first
+            self.pages = collections.OrderedDict()
+            # position -> serial number of the page holding it
+            self.owner = dict()
+            self.serial = 0
+            self.stored_bytes = 0
+            self.evicted = set()
+        else:
+            self.pages = None
+
+    # whether records are denormalized from the referenced_objects of the
+    # pages holding them
+    referenced = False
+
+    def pageStart(self, idx):
+        """Index of the first record of the page to fetch for record idx:
+        the start of its batch-aligned page, less any records of that page
+        already stored before idx"""
+        start = idx - idx % self.batch
+        while start < idx and start in self.storage:
+            start += 1
+        return start
 
-    def loadBatch(self, idx):
-        """Fetch some data and store it"""
-        obj = self.getData({'start': idx})['result']
-        self.storeBatch(obj)
+    def pageSize(self, start):
+        """Records to fetch from start, stopping short of stored records"""
+        for idx in xrange(start + 1, start + self.batch):
+            if idx in self.storage:
+                return idx - start
+        return self.batch
 
-    def storeBatch(self, obj):
-        """Given the result of a fetch, store the data"""
+    def loadBatch(self, idx):
+        """Fetch the page holding record idx, and store it"""
+        start = self.pageStart(idx)
+        size = self.pageSize(start)
+        if start + size <= idx:
+            # records stored between the page start and idx (as when the
+            # batch size has changed) would cut the page short of idx, so
+            # start after the last of them instead
+            start = idx
+            while start > 0 and start - 1 not in self.storage:
+                start -= 1
+            size = self.pageSize(start)
+        self.storeBatch(self.fetchPage(start, size))
+
+    def adapt(self, batch, records, elapsed, response=None):
+        """Resize the batch after fetching records in a page of batch,
+        given how long it took and the response"""
+        if records < batch:
+            # a short last page says little
+            return
+        size = getattr(response, 'decoded_bytes', None)
+        per_record = float(size) / records if isinstance(size, (int, long)) else None
+        if elapsed > TARGET_PAGE_SECONDS * 2 or (
+                per_record and per_record * batch > MAX_PAGE_BYTES):
+            self.batch = max(1, batch // 2)
+        elif elapsed < TARGET_PAGE_SECONDS / 2:
+            grown = min(batch * 2, shiftboard.MAX_BATCH_SIZE)
+            if per_record:
+                grown = min(grown, max(batch, int(MAX_PAGE_BYTES / per_record)))
+            self.batch = grown
+
+    def storeBatch(self, obj, storage=None):
+        """Given the result of a fetch, store the data (in storage, if
+        given, rather than our own)"""
+        if storage is None:
+            storage = self.storage
         self.count = int(obj['count'])
         if self.count == 0:
             return
@@ -95,13 +219,84 @@ class Results(object):
             start = obj['page']['this']['start'] - 1
         except:
             start = 0
+        first = start
+        objidx = None
+        if self.referenced and 'referenced_objects' in obj:
+            objidx = referenced_index(obj['referenced_objects'])
         for obj in obj[self.child.name_plural]:
-            self.storage[start] = self.element(obj)
+            if not isinstance(obj, (Result, CompactRecord)):
+                # (streamed records arrive already converted)
+                obj = self.element(obj)
+            if objidx is not None:
+                obj.denormalizeReferenced(objidx)
+            storage[start] = obj
+            if storage is self.storage:
+                for listener in self.listeners:
+                    listener(start, obj)
             start += 1
+        if self.pages is not None and storage is self.storage and start > first:
+            self.remember(xrange(first, start))
+            self.evict()
+
+    def remember(self, positions):
+        """Track newly stored positions as the most recently used page"""
+        pages, owner = self.pages, self.owner
+        for idx in positions:
+            serial = owner.get(idx)
+            if serial is not None:
+                # stored again; no longer part of its earlier page
+                page = pages[serial]
+                page[0].discard(idx)
+                self.stored_bytes -= page[1]
+                if not page[0]:
+                    del pages[serial]
+        if self.evicted.intersection(positions):
+            self.evicted.difference_update(positions)
+            self.refetches += 1
+        per_record = 0
+        if self.max_bytes:
+            per_record = sum(_size(self.storage[idx]) for idx in positions) // len(positions)
+        self.serial += 1
+        pages[self.serial] = [set(positions), per_record]
+        for idx in positions:
+            owner[idx] = self.serial
+        self.stored_bytes += per_record * len(positions)
+
+    def touch(self, idx):
+        """Mark the page holding a stored position as most recently used"""
+        serial = self.owner.get(idx)
+        if serial is not None and serial != next(reversed(self.pages)):
+            self.pages[serial] = self.pages.pop(serial)
+
+    def evict(self):
+        """Drop least recently used pages (but never the last one) until
+        within max_pages and max_bytes"""
+        pages = self.pages
+        while len(pages) > 1 and (
+                (self.max_pages and len(pages) > self.max_pages) or
+                (self.max_bytes and self.stored_bytes > self.max_bytes)):
+            serial, (positions, per_record) = pages.popitem(last=False)
+            for idx in positions:
+                del self.storage[idx]
+                del self.owner[idx]
+                for listener in self.listeners:
+                    listener(idx, None)
+            self.evicted.update(positions)
+            self.stored_bytes -= per_record * len(positions)
+            self.evictions += 1
+
+    def listen(self, listener):
+        """Call listener(position, record) for each record stored from now
+        on, and listener(position, None) for each evicted"""
+        self.listeners.append(listener)
+
+    def unlisten(self, listener):
+        self.listeners.remove(listener)
 
     def getData(self, page={}):
         """Make the API call to get some data"""
-        page['batch'] = self.batch
+        page = dict(page)
+        page.setdefault('batch', self.batch)
         return self.session.apicall('%s.list' % self.child.name,
                                     select=self.select,
                                     page=page,
@@ -111,6 +306,8 @@ class Results(object):
 
     def element(self, d):
         """Converts a dict of data to an element object"""
+        if self.compact:
+            return compact_class(self.child)(self.session, seed=d)
         return self.child(self.session, seed=d)
 
     def __repr__(self):
@@ -121,28 +318,172 @@ class Results(object):
         try:
             return self.count
         except AttributeError:
-            self.loadBatch(0)
+            if self.keep:
+                self.loadBatch(0)
+            else:
+                self.storeBatch(self.fetchPage(0), dict())
             return self.count
 
     def __getitem__(self, idx):
         try:
             if idx >= self.count:
                 raise IndexError
-            return self.storage[idx]
+            record = self.storage[idx]
         except (KeyError, AttributeError):
             self.loadBatch(idx)
             try:
-                return self.storage[idx]
+                record = self.storage[idx]
             except (KeyError, AttributeError):
                 return None
+        if self.pages is not None:
+            self.touch(idx)
+        return record
 
     def __iter__(self):
+        if not self.keep:
+            for record in self.stream():
+                yield record
+            return
+        if self.readahead:
+            for record in self.iterReadahead():
+                yield record
+            return
         for idx in range(0, len(self)):
             if idx >= len(self):
                 # Why in the world is this happening???
                 break
             yield self[idx]
 
+    def iterReadahead(self):
+        """Iterate, keeping up to readahead pages ahead being fetched"""
+        from multiprocessing.pool import ThreadPool
+
+        count = len(self)
+        pool = ThreadPool(self.readahead)
+        pending = collections.deque()
+        ahead = 0
+        try:
+            for idx in xrange(count):
+                ahead = max(ahead, idx)
+                while len(pending) < self.readahead and ahead < count:
+                    if ahead in self.storage:
+                        ahead += 1
+                        continue
+                    batch = self.pageSize(ahead)
+                    pending.append(pool.apply_async(self.fetchPage, (ahead, batch)))
+                    ahead += batch
+                while idx not in self.storage and pending:
+                    self.storeBatch(pending.popleft().get())
+                yield self[idx]
+        finally:
+            pool.close()
+
+    def iter_pages(self):
+        """Fetch every page in turn, yielding each as a list of records
+        which are not stored: only the page in hand (and any being read
+        ahead) is kept in memory, however long the list.  len() is known
+        once the first page has arrived."""
+        pool = None
+        if self.readahead:
+            from multiprocessing.pool import ThreadPool
+
+            pool = ThreadPool(self.readahead)
+        pending = collections.deque()
+        idx = ahead = 0
+        try:
+            while True:
+                # until the first page arrives, fetch just that
+                count = getattr(self, 'count', 1)
+                if pool:
+                    while len(pending) < self.readahead and ahead < count:
+                        batch = self.batch
+                        pending.append(pool.apply_async(self.fetchPage, (ahead, batch)))
+                        ahead += batch
+                    if not pending:
+                        break
+                    obj = pending.popleft().get()
+                elif idx < count:
+                    obj = self.fetchPage(idx)
+                else:
+                    break
+                records = dict()
+                self.storeBatch(obj, records)
+                if not records:
+                    break
+                idx = max(records) + 1
+                yield [records[n] for n in sorted(records)]
+        finally:
+            if pool:
+                pool.close()
+
+    def stream(self):
+        """Yield every record, without storing them (see iter_pages)"""
+        for page in self.iter_pages():
+            for record in page:
+                yield record
+
+    def fetchPage(self, idx, batch=None):
+        """Fetch the page of records starting at idx, without storing it"""
+        batch = batch or self.batch
+        local = self.session.local
+        local.response = None
+        started = time.time()
+        with self.session.streaming(self.child.name_plural, self.element):
+            obj = self.getData({'start': idx + 1, 'batch': batch})['result']
+        if self.adaptive:
+            self.adapt(batch, len(obj.get(self.child.name_plural) or ()),
+                       time.time() - started, getattr(local, 'response', None))
+        return obj
+
+    def load_all(self, workers=1):
+        """Fetch every record not already stored.
+
+        With workers > 1, once the first page has given the record count,
+        the remaining pages are fetched in parallel on that many threads
+        and then stored in index order.
+
+        A list limited by max_pages or max_bytes cannot hold every record,
+        so raises ValueError.
+        """
+        if self.pages is not None:
+            raise ValueError('%s limited by max_pages or max_bytes cannot load '
+                             'every record' % (self.__class__.__name__,))
+        count = len(self)
+        if workers > 1:
+            # pages of the current batch size, from the first record missing
+            # after the first page (whatever its size)
+            batch = self.batch
+            starts = []
+            idx = 0
+            while idx < count:
+                if idx in self.storage:
+                    idx += 1
+                else:
+                    starts.append(idx)
+                    idx += batch
+            if starts:
+                from multiprocessing.pool import ThreadPool
+
+                pool = ThreadPool(min(workers, len(starts)))
+                try:
+                    pages = pool.map(lambda start: self.fetchPage(start, batch),
+                                     starts)
+                finally:
+                    pool.close()
+                for obj in pages:
+                    self.storeBatch(obj)
+
+        idx = 0
+        while idx < len(self):
+            if idx not in self.storage:
+                self.loadBatch(idx)
+            idx += 1
+        return self
+
+    def prefetch(self, workers=WORKERS):
+        """Load all records using parallel page fetches"""
+        return self.load_all(workers=workers)
+
     def __getslice__(self, start, end):
         d = []
         for idx in range(start, end):
@@ -154,13 +495,112 @@ class Results(object):
         vals = set()
         for rec in self:
             if key in rec and rec[key]:
-                if isinstance(rec[key], dict) and 'id' in rec[key]:
+                if isinstance(rec[key], RECORD_TYPES) and 'id' in rec[key]:
                     vals.add(rec[key]['id'])
                 else:
                     vals.add(rec[key])
         return vals
 
-    def denormalize(self, cls, key=None, selectkey=None):
+    def index(self, load=True, **kwargs):
+        """Indexes over the records (all of them, unless load is false),
+        kept up to date as more are stored or evicted.  See
+        shiftboard.index.  A list limited by max_pages or max_bytes can
+        only index the records it holds, so must have load false."""
+        from index import Index
+
+        if load:
+            self.load_all()
+        return Index(self, **kwargs)
+
+    def to_columns(self, fields=None, frame=False):
+        """Fetch every record, returning the values of the named fields
+        (by default, those the child class lists) as columns: a dict of
+        numpy arrays, or a pandas DataFrame if frame is true.  See
+        shiftboard.columns."""
+        from columns import to_columns
+
+        fields = fields or getattr(self.child, 'fields', None)
+        if not fields:
+            raise ValueError('No fields given for %s' % (self.child.__name__,))
+        return to_columns(self, fields, frame)
+
+    def chunks(self, size):
+        """Iterate over the records in lists of up to size, as they are
+        fetched"""
+        chunk = []
+        for rec in self:
+            chunk.append(rec)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def references(self, cls, selectkey):
+        """Records of cls already fetched by selectkey in the session (in
+        our representation), by id, with None for ids not found"""
+        return self.session.references.setdefault(
+            (cls, selectkey, self.compact), dict())
+
+    def selectReferences(self, cls, selectkey, ids):
+        """Fetch the records of cls with the given ids (no more than
+        MAX_BATCH_SIZE of them), returning the ids and the records found
+        for rememberReferences"""
+        found = list(cls(self.session, select={selectkey: list(ids)},
+                         batch=shiftboard.MAX_BATCH_SIZE, compact=self.compact))
+        return ids, found
+
+    def rememberReferences(self, cls, selectkey, selected, resolved):
+        """Keep what selectReferences found in resolved, and in the
+        session's references"""
+        ids, found = selected
+        found = [(ident, None) for ident in ids] + [(o['id'], o) for o in found]
+        resolved.update(found)
+        self.references(cls, selectkey).update(found)
+
+    def knownReferences(self, cls, selectkey, ids, resolved):
+        """Copy into resolved any of ids the session has already resolved,
+        returning those it has not.  (The session may forget them at any
+        time, on a change made from another thread, so each call resolves
+        into its own dict.)"""
+        cached = self.references(cls, selectkey)
+        missing = []
+        for ident in ids:
+            if ident in resolved:
+                continue
+            record = cached.get(ident, missing)
+            if record is missing:
+                missing.append(ident)
+            else:
+                resolved[ident] = record
+        return missing
+
+    def resolve(self, cls, selectkey, ids, workers=WORKERS):
+        """Records of cls with the given ids (by selectkey), as a dict by
+        id with None for those not found.  Ids already resolved in the
+        session are not fetched again; the rest are selected
+        MAX_BATCH_SIZE at a time, on up to workers threads."""
+        resolved = dict()
+        missing = self.knownReferences(cls, selectkey, ids, resolved)
+        if missing:
+            size = shiftboard.MAX_BATCH_SIZE
+            chunks = [missing[n:n + size] for n in range(0, len(missing), size)]
+            select = lambda chunk: self.selectReferences(cls, selectkey, chunk)
+            if workers > 1 and len(chunks) > 1:
+                from multiprocessing.pool import ThreadPool
+
+                pool = ThreadPool(min(workers, len(chunks)))
+                try:
+                    found = pool.map(select, chunks)
+                finally:
+                    pool.close()
+            else:
+                found = [select(chunk) for chunk in chunks]
+            for selected in found:
+                self.rememberReferences(cls, selectkey, selected, resolved)
+        return dict((ident, resolved[ident]) for ident in ids)
+
+    def denormalize(self, cls, key=None, selectkey=None, workers=WORKERS):
         """Replace id numbers in values with detail records
 
         { name: 'some object',
@@ -182,23 +622,57 @@ class Results(object):
 
         key = key or cls.child.name
         selectkey = selectkey or cls.child.name
-        ids = self.getAllValues(key)
-
-        if not ids:
-            return
 
-        objects = dict(
-            (o['id'], o) for o in cls(
-                self.session,
-                select={selectkey: list(ids)},
-                batch=shiftboard.MAX_BATCH_SIZE)
-        )
+        # the records for ids this call refers to
+        resolved = dict()
+        # threads to select ids on, started once there are any to select
+        pool = None
+        # (records, selects of ids they refer to), in order
+        pending = collections.deque()
+        selecting = set()
+
+        def finish():
+            refs, selected = pending.popleft()
+            if selected is not None:
+                self.rememberReferences(cls, selectkey, selected.get(), resolved)
+            for rec, value in refs:
+                rec[key] = resolved[value]
 
-        for rec in self:
-            if key in rec and rec[key]:
-                if isinstance(rec[key], dict) and rec[key].get('id') in objects:
-                    rec[key] = objects[rec[key]['id']]
-                elif rec[key] in objects:
-                    rec[key] = objects[rec[key]]
-                else:
-                    rec[key] = None
+        try:
+            # as records are fetched, the ids each chunk refers to (and which
+            # are not yet resolved) are selected in the background while
+            # further pages are fetched
+            for chunk in self.chunks(shiftboard.MAX_BATCH_SIZE):
+                refs = []
+                for rec in chunk:
+                    value = rec.get(key)
+                    if isinstance(value, RECORD_TYPES):
+                        value = value.get('id')
+                    if value:
+                        refs.append((rec, value))
+                missing = set(self.knownReferences(
+                    cls, selectkey, [value for rec, value in refs], resolved))
+                missing.difference_update(selecting)
+                selected = None
+                if missing:
+                    selecting.update(missing)
+                    if workers > 1:
+                        if pool is None:
+                            from multiprocessing.pool import ThreadPool
+
+                            pool = ThreadPool(workers)
+                        selected = pool.apply_async(
+                            self.selectReferences, (cls, selectkey, missing))
+                    else:
+                        self.rememberReferences(
+                            cls, selectkey, self.selectReferences(cls, selectkey, missing),
+                            resolved)
+                pending.append((refs, selected))
+                while pending and (len(pending) > workers or pending[0][1] is None or
+                                   pending[0][1].ready()):
+                    finish()
+            while pending:
+                finish()
+        finally:
+            if pool:
+                pool.close()
@@ -0,0 +1,127 @@
+"""
+Retrying idempotent api calls after transient failures.
+
+  session = Session(key_id, key, retry=RetryPolicy(retries=5))
+  ...
+  print session.retry.stats()
+
+"""
+import httplib
+import random
+import sys
+import threading
+import time
+
+# read-only methods, which are safe to send again
+IDEMPOTENT_SUFFIXES = ('.list', '.get', '.whosOn', '.self')
+IDEMPOTENT_METHODS = frozenset([
+    'timeclock.status', 'system.echo', 'account.listMemberships',
+    'account.getImage', 'shift.getOfferedTrade'])
+
+# HTTP statuses indicating a transient or throttling failure
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+def idempotent(method):
+    """Is it safe to repeat a call to this method?"""
+    return method in IDEMPOTENT_METHODS or method.endswith(IDEMPOTENT_SUFFIXES)
+
+
+def retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+    import email.utils
+
+    date = email.utils.parsedate_tz(value)
+    if date:
+        return max(0, email.utils.mktime_tz(date) - time.time())
+    return None
+
+
+class RetryPolicy(object):
+    """Exponential backoff with full jitter, limited by a retry budget.
+
+    A failed idempotent call is retried up to `retries` times, sleeping a
+    random time up to backoff * 2**attempt seconds (or as long as the
+    server's Retry-After asks) between attempts, never more than
+    max_backoff.  Each retry also spends a token from a budget shared by
+    all calls, and each successful call earns back `refill` tokens, so a
+    persistent outage can't turn into a retry storm.
+    """
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30,
+                 budget=10, refill=0.1):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.refill = refill
+        self.tokens = float(budget)
+        self.lock = threading.Lock()
+        self.retried = 0
+        self.exhausted = 0
+
+    def delay(self, attempt, after=None):
+        """Seconds to wait before retry number attempt (from 0)"""
+        if after is not None:
+            return min(self.max_backoff, after)
+        return random.uniform(0, min(self.max_backoff,
+                                     self.backoff * 2 ** attempt))
+
+    def spend(self):
+        """Take a token from the retry budget, if there's one left"""
+        with self.lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.retried += 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def succeeded(self):
+        """Earn back part of a token after a successful call"""
+        with self.lock:
+            self.tokens = min(self.budget, self.tokens + self.refill)
+
+    def send(self, request, idempotent=True):
+        """Call request() until it gives a response which is not a
+        transient failure, or retries run out.  Returns the last response
+        and the number of retries made; if the last attempt raised an
+        error, it is raised again."""
+        attempt = 0
+        while True:
+            failure = response = None
+            try:
+                response = request()
+            except (httplib.HTTPException, IOError):
+                failure = sys.exc_info()
+
+            if response is not None and response.status not in RETRY_STATUSES:
+                if response.status < 400:
+                    self.succeeded()
+                return response, attempt
+
+            if not (idempotent and attempt < self.retries and self.spend()):
+                if failure:
+                    raise failure[0], failure[1], failure[2]
+                return response, attempt
+
+            after = None
+            if response is not None:
+                after = retry_after(response.headers.get('retry-after'))
+                response.close()
+            time.sleep(self.delay(attempt, after))
+            attempt += 1
+
+    def stats(self):
+        """Retry counts so far"""
+        return {
+            'retried': self.retried,
+            'exhausted': self.exhausted,
+            'tokens': self.tokens,
+        }
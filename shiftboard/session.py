@@ -11,44 +11,200 @@ Synopsis:
   print 'my name is: %s' % (me.fullName(),)
 
 """
-import shiftboard.session
-
-from shiftboard.call import _ApiCall, _ApiCallJson, _ApiCallToken
-from shiftboard.account import Account, MyAccount, Accounts
-from shiftboard.availability import Availability, AvailabilityList
-from shiftboard.workgroup import Workgroup, Workgroups
-from shiftboard.location import Location, Locations
-from shiftboard.shift import Shift, Shifts, ExtendedShifts, WhosOnShifts
-from shiftboard.tradeboard import Trade, Trades
-from shiftboard.timeclock import Timeclock, WhosOnTimeclocks
-from shiftboard.client import Client, Clients
-from shiftboard.role import Role, Roles
-from shiftboard.profile import ProfileConfiguration, ProfileConfigurationList, ProfileType, ProfileTypes, ProfileData, ProfileDataList
-
+import contextlib
+import importlib
+import threading
+
+import shiftboard.lazy
+
+from shiftboard.call import _ApiCall, _ApiCallJson, _ApiCallToken, _ApiBatch
+from shiftboard.transport import Transport
+from shiftboard.retry import RetryPolicy, idempotent
+from shiftboard.flight import SingleFlight, callkey
+from shiftboard.cache import writes
+import shiftboard.codec
+import shiftboard.instrument
+from shiftboard.identity import IdentityMap
+from shiftboard import MODELS
 URL = 'https://www.shiftboard.com/servola/api/api.cgi'
 
+# modules defining the API object-wrapper classes (see shiftboard.MODELS),
+# by class name; each is imported the first time one of its classes is used,
+# whether through a session or as a name in this module
+MODULES = dict((name, 'shiftboard.' + module)
+               for module, names in MODELS.iteritems() for name in names)
+
 
 class Session(object):
-    """Implement an API session, storing session data and transaction ID"""
+    """Implement an API session, storing session data and transaction ID
+
+    With post=True, requests are sent as a JSON body rather than as a
+    base64-encoded query string, avoiding URL length limits on large
+    selects and bulk writes.
+
+    Idempotent calls failing with a transient error are retried as the
+    RetryPolicy given as retry allows; pass RetryPolicy(retries=0) to
+    disable retries.
+
+    Unless coalesce is False, identical idempotent calls made at the same
+    time from several threads share a single request and its result.
+
+    Given a ResponseCache as cache, responses to read-only calls are
+    cached for as long as it allows, and dropped when the session calls a
+    method that modifies the data (see shiftboard.cache.writes).
+
+    With stream=True, Results lists decode each page incrementally from
+    the connection, building one record at a time.  Pages read this way
+    are neither cached nor coalesced, since their records are built for
+    the list reading them: stream and cache are best not combined.
+
+    Requests are sent by transport, by default a urllib2 Transport
+    (honouring proxy settings and following redirects); pass a
+    PooledTransport to keep connections alive between calls (see
+    shiftboard.transport).
+
+    Requests are encoded and responses decoded by codec, by default the
+    fastest JSON backend installed (see shiftboard.codec).
 
-    def __init__(self, access_key_id, signature_key, url=URL, id=1):
+    Functions registered with on() are told about each call made (see
+    shiftboard.instrument).
+
+    Records fetched by Results.denormalize are kept in references, so each
+    is fetched once per session until it calls a method that modifies data.
+    Objects records refer to are likewise shared through identities (see
+    shiftboard.identity).
+    """
+
+    # class implementing (and signing) a single api call
+    api_class = _ApiCall
+
+    def __init__(self, access_key_id, signature_key, url=URL, id=1,
+                 transport=None, post=False, retry=None, coalesce=True,
+                 cache=None, stream=False, codec=None):
         self.access_key_id = access_key_id
         self.signature_key = signature_key
         self.url = url
         self.id = id - 1
+        self.lock = threading.Lock()
+        self.transport = transport or Transport()
+        self.post = post
+        self.retry = retry or RetryPolicy()
+        self.flights = SingleFlight() if coalesce else None
+        self.cache = cache
+        self.stream = stream
+        self.codec = codec or shiftboard.codec.default
+        self.local = threading.local()
+        self.hooks = dict()
+        # (Results class, select key, compact) -> id -> record, or None if
+        # not found
+        self.references = dict()
+        self.identities = IdentityMap()
 
     def apicall(self, method, **kwargs):
         """Make an API call"""
-        self.id += 1
-        api_handle = _ApiCall(self, method)
-        return api_handle.get_result(kwargs)
+        sink = getattr(self.local, 'sink', None)
+        if sink and idempotent(method):
+            # (bypassing the cache and coalescing; see above)
+            self.local.sink = None
+            return self._apicall(method, kwargs, sink)
+
+        if not idempotent(method):
+            try:
+                return self._apicall(method, kwargs)
+            finally:
+                if writes(method):
+                    self.invalidate(method)
+
+        cache = self.cache if self.cache and self.cache.cacheable(method) else None
+        if not (cache or self.flights):
+            return self._apicall(method, kwargs)
+
+        key = self.principal() + ' ' + callkey(method, kwargs)
+        if cache:
+            found, result = cache.get(key)
+            if found:
+                return result
+        if self.flights:
+            result = self.flights.do(key, lambda: self._apicall(method, kwargs))
+        else:
+            result = self._apicall(method, kwargs)
+        if cache:
+            cache.put(method, key, result)
+        return result
+
+    def invalidate(self, method):
+        """Forget what may have been changed by a call to a modifying method"""
+        self.references.clear()
+        self.identities.clear()
+        if self.cache:
+            self.cache.invalidate(method)
+
+    def principal(self):
+        """Who calls are made as, so that sessions sharing a cache are not
+        given each other's responses"""
+        return '%s@%s' % (self.access_key_id, self.url)
+
+    def _apicall(self, method, params, sink=None):
+        api_handle = self.api_class(self, method, self.nextId())
+        if sink:
+            return api_handle.get_result_stream(params, *sink)
+        return api_handle.get_result(params)
+
+    @contextlib.contextmanager
+    def streaming(self, key, element):
+        """If the session streams, the first read call made in this thread
+        within the block decodes the records of its result's key list
+        incrementally, replacing each with element(record)."""
+        if not self.stream:
+            yield
+            return
+        self.local.sink = (key, element)
+        try:
+            yield
+        finally:
+            self.local.sink = None
+
+    def on(self, event, hook):
+        """Call hook(CallEvent) on event: 'before_request',
+        'after_response' or 'on_error'"""
+        if event not in shiftboard.instrument.EVENTS:
+            raise ValueError('Unknown event %s' % (event,))
+        self.hooks.setdefault(event, []).append(hook)
+
+    def emit(self, event, call_event):
+        for hook in self.hooks.get(event, ()):
+            hook(call_event)
+
+    def nextId(self):
+        """Allocate the next transaction ID (safe across threads)"""
+        with self.lock:
+            self.id += 1
+            return self.id
+
+    def batch(self):
+        """Start a batch of api calls, to be sent in a single request"""
+        return _ApiBatch(self)
+
+    def apicall_batch(self, calls):
+        """Make several API calls in one request.  Takes a list of
+        (method, params) pairs and returns a list of BatchCall objects,
+        whose result() gives the response or raises that call's error."""
+        batch = self.batch()
+        for method, params in calls:
+            batch.apicall(method, **params)
+        return batch.send()
 
     def __getattr__(self, name, *args, **kwargs):
         """Here we return any sort of API object-wrapper we may have included
         in this module, initialized with the arguments provided as well as a
         reference to this session."""
 
-        cls = getattr(shiftboard.session, name)
+        try:
+            modname = MODULES[name]
+        except KeyError:
+            raise AttributeError("'%s' object has no attribute '%s'" % (
+                self.__class__.__name__, name))
+        cls = getattr(importlib.import_module(modname), name)
 
         def callable(*args, **kwargs):
             return cls(self, *args, **kwargs)
@@ -61,6 +217,10 @@ class Session(object):
     signature_key: %s
     url: %s""" % (self.__class__.__name__, self.access_key_id, self.signature_key, self.url)
 
+    def close(self):
+        """Close any connections held open by the transport"""
+        self.transport.close()
+
     def echo(self, message="hello"):
         return self.apicall('system.echo', message=message)
 
@@ -68,14 +228,21 @@ class Session(object):
 class TokenSession(Session):
     """Session that authenticates using token (in addition to system API key)"""
 
+    api_class = _ApiCallToken
+
     def __init__(self, token, *args, **kwargs):
         self.token = token
         super(TokenSession, self).__init__(*args, **kwargs)
 
     def call(self, name):
-        self.id += 1
-        return _ApiCallToken(self, name)
+        return _ApiCallToken(self, name, self.nextId())
+
+    def principal(self):
+        return '%s:%s' % (super(TokenSession, self).principal(), self.token)
 
     def __str__(self):
         return """%s
     token: %s""" % (super(TokenSession, self).__str__(), self.token)
+
+
+shiftboard.lazy.install(__name__, MODULES)
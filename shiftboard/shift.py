@@ -3,6 +3,7 @@ Classes to represent single and multiple shifts.
 """
 import time, datetime
 
+import isodate
 from result import *
 from workgroup import Workgroups
 from account import Accounts
@@ -20,6 +21,13 @@ class Shift(Result):
     name = 'shift'
     name_plural = 'shifts'
 
+    # fields stored in slots by compact records
+    fields = ('id', 'subject', 'details', 'start_date', 'end_date', 'created',
+              'timezone', 'workgroup', 'location', 'covering_member',
+              'covering_workgroup', 'covered', 'published', 'urgent',
+              'no_pick_up', 'qty', 'count', 'reference_id', 'work_status_type',
+              'role')
+
     def __init__(self, *initial_data, **kwargs):
         super(Shift, self).__init__(*initial_data, **kwargs)
         if len(initial_data) > 1:
@@ -105,34 +113,27 @@ class Shift(Result):
 
     def allDay(self):
         try:
-            datetime.datetime.strptime(
-                self['start_date'], '%Y-%m-%dT%H:%M:%S')
+            isodate.parse_datetime(self['start_date'])
             return False
         except ValueError:  # all-day events have no start time
             return True
 
     def startDate(self):
         """parse start date/time into standard python structure"""
-        try:
-            return datetime.datetime.strptime(
-                self['start_date'], '%Y-%m-%dT%H:%M:%S')
-        except ValueError:  # all-day events have no start time
-            return datetime.datetime.strptime(
-                self['start_date'], '%Y-%m-%d')
+        # all-day events have no start time
+        return isodate.parse(self['start_date'])
 
     def endDate(self):
         """parse end date/time into standard python structure"""
         try:
-            return datetime.datetime.strptime(
-                self['end_date'], '%Y-%m-%dT%H:%M:%S')
+            return isodate.parse_datetime(self['end_date'])
         except KeyError:
             return None
 
     def createDate(self):
         """parse create date/time into standard python structure"""
         try:
-            return datetime.datetime.strptime(
-                self['created'], '%Y-%m-%dT%H:%M:%SZ')
+            return isodate.parse_datetime(self['created'])
         except KeyError:
             return None
 
@@ -221,26 +222,7 @@ class Shift(Result):
 class Shifts(Results):
     """Represents a list of shifts"""
     child = Shift
-
-    def storeBatch(self, obj):
-        Results.storeBatch(self, obj)
-        if 'referenced_objects' in obj and int(obj['count']) > 0:
-            robjs = obj['referenced_objects']
-
-            # index objects by most likely unique key
-            objidx = dict()
-            for objname, objarr in robjs.iteritems():
-                for robj in objarr:
-                    if 'id' in robj:
-                        objidx.setdefault(objname, dict())[robj['id']] = robj
-                    elif 'name' in robj:
-                        objidx.setdefault(objname, dict())[robj['name']] = robj
-            try:
-                start = obj['page']['this']['start'] - 1
-            except Exception as e:
-                start = 0
-            for idx in range(start, start + len(obj[self.child.name_plural])):
-                self.storage[idx].denormalizeReferenced(objidx)
+    referenced = True
 
     def denormalizeWorkgroups(self):
         self.denormalize(Workgroups)
@@ -279,7 +261,8 @@ class ExtendedShifts(Shifts):
     """Represents a list of shifts having an extended attribute list"""
 
     def getData(self, page={}):
-        page['batch'] = self.batch
+        page = dict(page)
+        page.setdefault('batch', self.batch)
         return self.session.apicall('shift.list',
                                     extended=True, select=self.select, page=page)
 
@@ -288,7 +271,8 @@ class WhosOnShifts(Shifts):
     """Represents a list of shifts scheduled right now"""
 
     def getData(self, page={}):
-        page['batch'] = self.batch
+        page = dict(page)
+        page.setdefault('batch', self.batch)
         return self.session.apicall('shift.whosOn',
                                     select=self.select, page=page)
 
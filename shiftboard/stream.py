@@ -0,0 +1,129 @@
+"""
+Incremental decoding of large list responses.
+
+A list response looks like
+
+  {"jsonrpc": "2.0", "id": 3, "result": {"count": 1000, "shifts": [...], ...}}
+
+decode() reads it from a file-like object a chunk at a time, handing each
+record of the list to a callback as soon as it has been decoded, so that
+neither the whole response text nor the whole decoded page need be held in
+memory at once.
+"""
+from call import json
+
+WHITESPACE = ' \t\n\r'
+
+_decoder = json.JSONDecoder()
+
+
+class _Buffer(object):
+    """Unconsumed text read from a file-like object"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, want=1):
+        """Read until at least want more characters are buffered, dropping
+        consumed text.  Returns False at the end of input."""
+        text = [self.text[self.pos:]]
+        have = len(text[0])
+        self.pos = 0
+        while not self.eof:
+            chunk = self.reader.read()
+            if not chunk:
+                self.eof = True
+            have += len(chunk)
+            text.append(chunk)
+            if have >= len(text[0]) + want:
+                break
+        self.text = ''.join(text)
+        return have > len(text[0])
+
+    def peek(self):
+        """Next non-whitespace character"""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.fill():
+                raise ValueError('Unexpected end of JSON input')
+
+    def expect(self, chars):
+        """Consume the next character, which must be one of chars"""
+        char = self.peek()
+        if char not in chars:
+            raise ValueError('Expected %r, found %r' % (chars, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except ValueError:
+                # incomplete; read as much again as is buffered, so a
+                # large value is not re-parsed once for every chunk
+                if not self.fill(max(1, len(self.text) - self.pos)):
+                    raise
+                continue
+            if end == len(self.text) and self.fill():
+                # a number may continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+
+def _members(buf):
+    """Yield the keys of an object, leaving the caller to consume each value"""
+    buf.expect('{')
+    if buf.peek() == '}':
+        buf.pos += 1
+        return
+    while True:
+        key = buf.value()
+        buf.expect(':')
+        yield key
+        if buf.expect(',}') == '}':
+            return
+
+
+def _items(buf, element):
+    """Yield element(item) for each item of an array"""
+    buf.expect('[')
+    if buf.peek() == ']':
+        buf.pos += 1
+        return
+    while True:
+        yield element(buf.value())
+        if buf.expect(',]') == ']':
+            return
+
+
+def decode(reader, key, element):
+    """Decode a JSON-RPC response read from reader, replacing each record
+    of the result's key list by element(record) as soon as it is read."""
+    buf = _Buffer(reader)
+    response = dict()
+    for name in _members(buf):
+        if name == 'result' and buf.peek() == '{':
+            result = response[name] = dict()
+            for field in _members(buf):
+                if field == key and buf.peek() == '[':
+                    result[field] = list(_items(buf, element))
+                else:
+                    result[field] = buf.value()
+        else:
+            response[name] = buf.value()
+    # read to the end, so the connection can be reused
+    while reader.read():
+        pass
+    return response
@@ -3,6 +3,7 @@ Classes to represent single and multiple shifts.
 """
 import time, datetime
 
+import isodate
 from result import *
 from workgroup import Workgroups, Workgroup
 from account import Accounts, Account
@@ -15,6 +16,8 @@ class Timeclock(Result):
 
     name = 'timeclock'
     name_plural = 'timeclocks'
+    fields = ('id', 'account', 'workgroup', 'shift', 'clocked_in', 'clocked_out',
+              'clocked_in_local', 'clocked_out_local', 'timezone')
 
     def __init__(self, session, seed=None, id=None):
         self.session = session
@@ -50,35 +53,20 @@ class Timeclock(Result):
 
         return '%s' % (self.startTime().strftime(timefmt),)
 
+    def localTime(self, key):
+        """parse a local time, or else the UTC time, into the local time"""
+        if key + '_local' in self:
+            return isodate.parse_datetime(self[key + '_local'])
+        # Standard time specified in UTC
+        return isodate.parse_datetime(self[key]) + isodate.utc_offset()
+
     def startTime(self):
         """parse clock in time into standard python structure"""
-        if 'clocked_in_local' in self:
-            timeobj = datetime.datetime.strptime(
-                self['clocked_in_local'], '%Y-%m-%dT%H:%M:%S')
-        else:
-            # Standard clockin specified in UTC time
-            clockin_str = self['clocked_in']
-            clockin_str = clockin_str.rstrip("Z")
-            clockin_time = datetime.datetime.strptime(
-                clockin_str, '%Y-%m-%dT%H:%M:%S')
-            utctzdiff = datetime.datetime.utcnow() - datetime.datetime.now()
-            timeobj = clockin_time - utctzdiff
-        return timeobj
+        return self.localTime('clocked_in')
 
     def endTime(self):
         """parse clock out time into standard python structure"""
-        if 'clocked_out_local' in self:
-            timeobj = datetime.datetime.strptime(
-                self['clocked_out_local'], '%Y-%m-%dT%H:%M:%S')
-        else:
-            # Standard clockin specified in UTC time
-            clockout_str = self['clocked_out']
-            clockout_str = clockin_str.rstrip("Z")
-            clockout_time = datetime.datetime.strptime(
-                clockout_str, '%Y-%m-%dT%H:%M:%S')
-            utctzdiff = datetime.datetime.utcnow() - datetime.datetime.now()
-            timeobj = clockout_time - utctzdiff
-        return timeobj
+        return self.localTime('clocked_out')
 
     def clockedin(self):
         """Boolean test for checked in status"""
@@ -181,35 +169,20 @@ class Timeclock(Result):
             obj = objects[obj_name][self[key]]
             if cls:
                 # higher level object
-                self[key] = cls(self.session, seed=obj)
+                self[key] = self.related(cls, obj)
             else:
                 # simple dict
-                self[key] = obj
+                self[key] = self.session.identities.intern(obj_name, obj)
 
 
 class WhosOnTimeclocks(Results):
     """Represents a list of timeclocks"""
     child = Timeclock
+    referenced = True
 
     def getData(self, page={}):
-        page['batch'] = self.batch
+        page = dict(page)
+        page.setdefault('batch', self.batch)
         result = self.session.apicall('timeclock.whosOn',
             extended=True, select=self.select, page=page)
         return result
-
-    def storeBatch(self, obj):
-        Results.storeBatch(self, obj)
-        if 'referenced_objects' in obj and int(obj['count']) > 0:
-            referenced_objs = obj['referenced_objects']
-
-            # index objects by most likely unique key
-            objidx = dict()
-            for referenced_name, referenced_list in referenced_objs.iteritems():
-                for referenced_obj in referenced_list:
-                    if 'id' in referenced_obj:
-                        objidx.setdefault(referenced_name, dict())[referenced_obj['id']] = referenced_obj
-                    elif 'name' in referenced_obj:
-                        objidx.setdefault(referenced_name, dict())[referenced_obj['name']] = referenced_obj
-            start = obj['page']['this']['start'] - 1
-            for idx in range(start, start + len(obj[self.child.name_plural])):
-                self.storage[idx].denormalizeReferenced(objidx)
@@ -38,24 +38,9 @@ class Trades(Results):
     """Represents a list of shifts on the Tradeboard"""
 
     child = Trade
-
-    def storeBatch(self, obj):
-        Results.storeBatch(self, obj)
-        if 'referenced_objects' in obj and int(obj['count']) > 0:
-            robjs = obj['referenced_objects']
-
-            # index objects by most likely unique key
-            objidx = dict()
-            for objname, objarr in robjs.iteritems():
-                for robj in objarr:
-                    if 'id' in robj:
-                        objidx.setdefault(objname, dict())[robj['id']] = robj
-                    elif 'name' in robj:
-                        objidx.setdefault(objname, dict())[robj['name']] = robj
-            start = obj['page']['this']['start'] - 1
-            for idx in range(start, start + len(obj[self.child.name_plural])):
-                self.storage[idx].denormalizeReferenced(objidx)
+    referenced = True
 
     def getData(self, page={}):
-        page['batch'] = self.batch
+        page = dict(page)
+        page.setdefault('batch', self.batch)
         return self.session.apicall('tradeboard.list', select=self.select, page=page)
@@ -0,0 +1,293 @@
+"""
+HTTP transports used by api calls to reach the Shiftboard API service.
+
+A transport is owned by a Session and shared by every call it makes:
+
+  session = Session(key_id, key, transport=PooledTransport(pool_size=8))
+
+"""
+import errno
+import httplib
+import socket
+import threading
+import time
+import urlparse
+import zlib
+
+CHUNK_SIZE = 64 * 1024
+
+ACCEPT_ENCODING = 'gzip, deflate'
+
+# errors with which a server closing an idle connection fails a request
+CLOSED_ERRNOS = (errno.ECONNRESET, errno.EPIPE, errno.ECONNABORTED)
+
+
+def unsent(error):
+    """Whether sending a request on a reused connection failed with error
+    because the server had closed it, and so never received the request.
+    (Not so for a timeout, say.)"""
+    if isinstance(error, socket.timeout):
+        return False
+    return isinstance(error, socket.error) and error.errno in CLOSED_ERRNOS
+
+
+class BodyReader(object):
+    """File-like reader of a response body, decompressing as it reads.
+    A body which cannot be decompressed raises IOError."""
+
+    def __init__(self, fp, encoding=None):
+        self.fp = fp
+        self.decoder = None
+        if encoding in ('gzip', 'x-gzip', 'deflate'):
+            # 32 + MAX_WBITS accepts either a gzip or a zlib header
+            self.decoder = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        # deflate is sometimes sent raw, without the zlib header; the body
+        # is kept until it has begun to decode, so as to try that instead
+        self.head = '' if encoding == 'deflate' else None
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.eof = False
+
+    def decompress(self, chunk):
+        try:
+            try:
+                if chunk:
+                    if self.head is not None:
+                        self.head += chunk
+                    decoded = self.decoder.decompress(chunk)
+                else:
+                    decoded = self.decoder.flush()
+            except zlib.error:
+                if not self.head:
+                    raise
+                head, self.head = self.head, None
+                self.decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+                decoded = self.decoder.decompress(head)
+                if not chunk:
+                    decoded += self.decoder.flush()
+        except zlib.error, e:
+            raise IOError('Error decompressing response: %s' % (e,))
+        if decoded:
+            self.head = None
+        return decoded
+
+    def read(self, size=CHUNK_SIZE):
+        """Return the next piece of the decoded body, or '' at the end.
+        (The piece may be larger or smaller than size.)"""
+        while not self.eof:
+            chunk = self.fp.read(size)
+            if chunk:
+                self.wire_bytes += len(chunk)
+            else:
+                self.eof = True
+            if self.decoder:
+                chunk = self.decompress(chunk)
+            if chunk:
+                self.decoded_bytes += len(chunk)
+                return chunk
+        return ''
+
+    def readall(self):
+        return ''.join(iter(self.read, ''))
+
+
+class Response(object):
+    """Status, headers and body of a completed HTTP exchange"""
+
+    def __init__(self, status, headers, body, wire_bytes=None):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        if wire_bytes is None:
+            wire_bytes = len(body)
+        self.wire_bytes = wire_bytes
+
+    @property
+    def decoded_bytes(self):
+        return len(self.body)
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return '<%s %s (%d bytes, %d on the wire)>' % (
+            self.__class__.__name__, self.status,
+            self.decoded_bytes, self.wire_bytes)
+
+
+class StreamResponse(Response):
+    """Response whose body is read incrementally through .reader.
+    close() must be called once done with it."""
+
+    def __init__(self, status, headers, reader, release):
+        self.status = status
+        self.headers = headers
+        self.reader = reader
+        self.release = release
+
+    @property
+    def body(self):
+        """The rest of the body, read all at once"""
+        return self.reader.readall()
+
+    @property
+    def wire_bytes(self):
+        return self.reader.wire_bytes
+
+    @property
+    def decoded_bytes(self):
+        return self.reader.decoded_bytes
+
+    def close(self):
+        """Release the connection, once only"""
+        release, self.release = self.release, None
+        if release:
+            release(self.reader.eof)
+
+
+class Transport(object):
+    """Simplest transport: a fresh urllib2 connection for every request.
+
+    Unless compress is False, gzip/deflate responses are requested and
+    decompressed as they are read.
+    """
+
+    def __init__(self, compress=True):
+        self.compress = compress
+
+    def headers(self, headers):
+        """Add transport-level headers to those of a request"""
+        headers = dict(headers)
+        if self.compress:
+            headers.setdefault('Accept-Encoding', ACCEPT_ENCODING)
+        return headers
+
+    def request(self, url, body=None, headers={}):
+        """Send a request, GET unless a body is given; returns a Response"""
+        response = self.stream(url, body, headers)
+        try:
+            data = response.reader.readall()
+        finally:
+            response.close()
+        return Response(response.status, response.headers, data,
+                        response.wire_bytes)
+
+    def stream(self, url, body=None, headers={}):
+        """Send a request, returning a StreamResponse as soon as the
+        response headers have arrived"""
+        import urllib2
+
+        req = urllib2.Request(url, body, self.headers(headers))
+        try:
+            conn = urllib2.urlopen(req)
+            status = conn.getcode()
+        except urllib2.HTTPError, e:
+            conn = e
+            status = e.code
+        info = dict(conn.info().items())
+        reader = BodyReader(conn, info.get('content-encoding'))
+        return StreamResponse(status, info, reader, lambda eof: conn.close())
+
+    def close(self):
+        """Release any resources held by the transport"""
+        pass
+
+
+class PooledTransport(Transport):
+    """Transport keeping persistent (keep-alive) connections per host.
+    Unlike Transport, it connects directly (ignoring any proxy settings)
+    and does not follow redirects.
+
+    At most pool_size idle connections are kept for each host; extra
+    connections opened by concurrent callers are closed once used.
+    Connections idle for longer than idle_timeout seconds are discarded
+    rather than reused.  A request which cannot be sent on a reused
+    connection, the server having closed it, is sent again on a fresh
+    one.  Any other failure is raised, leaving retries to the session's
+    RetryPolicy: once a request has been sent, the server may have acted
+    on it, even if the connection then fails without a response.
+    """
+
+    def __init__(self, pool_size=4, idle_timeout=30, timeout=60, compress=True):
+        super(PooledTransport, self).__init__(compress)
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.pools = dict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(url):
+        parts = urlparse.urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        return (parts.scheme, parts.hostname, parts.port), path
+
+    def connect(self, key):
+        """Open a new connection to (scheme, host, port)"""
+        scheme, host, port = key
+        if scheme == 'https':
+            return httplib.HTTPSConnection(host, port, timeout=self.timeout)
+        return httplib.HTTPConnection(host, port, timeout=self.timeout)
+
+    def acquire(self, key):
+        """Get an idle connection to the host, or a new one.
+        Returns the connection and whether it is being reused."""
+        now = time.time()
+        with self.lock:
+            idle = self.pools.setdefault(key, [])
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used < self.idle_timeout:
+                    return conn, True
+                conn.close()
+        return self.connect(key), False
+
+    def release(self, key, conn):
+        """Return a connection to the pool, closing it if the pool is full"""
+        with self.lock:
+            idle = self.pools.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append((conn, time.time()))
+                return
+        conn.close()
+
+    def stream(self, url, body=None, headers={}):
+        key, path = self._key(url)
+        method = 'GET' if body is None else 'POST'
+        headers = self.headers(headers)
+        conn, reused = self.acquire(key)
+        while True:
+            try:
+                conn.request(method, path, body, headers)
+                break
+            except (httplib.HTTPException, socket.error) as e:
+                conn.close()
+                if not (reused and unsent(e)):
+                    raise
+                # stale keep-alive connection; reconnect and try again
+                conn, reused = self.connect(key), False
+        try:
+            resp = conn.getresponse()
+        except:
+            conn.close()
+            raise
+
+        def release(eof):
+            # a connection can only be reused once its response is read
+            if eof and not resp.will_close:
+                self.release(key, conn)
+            else:
+                conn.close()
+
+        reader = BodyReader(resp, resp.getheader('content-encoding'))
+        return StreamResponse(resp.status, dict(resp.getheaders()),
+                              reader, release)
+
+    def close(self):
+        with self.lock:
+            pools, self.pools = self.pools, dict()
+        for idle in pools.values():
+            for conn, last_used in idle:
+                conn.close()
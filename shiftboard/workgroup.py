@@ -7,6 +7,7 @@ from result import *
 class Workgroup(Result):
     name = 'workgroup'
     name_plural = 'workgroups'
+    fields = ('id', 'name', 'timezone')
 
     def fullName(self):
         """To let us gloss over the difference between people and workgroups"""
@@ -0,0 +1,40 @@
+import shiftboard
+import unittest
+from mock import MagicMock
+
+class TestAsyncSession(unittest.TestCase):
+
+    def setUp(self):
+        self.session = shiftboard.AsyncSession('mock_access_key', 'mock_signature_key', url='mock_url', workers=2)
+        self.session.apicall = MagicMock(name='apicall')
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_apicall_async(self):
+        self.session.apicall.return_value = {"result": {"message": "hello"}}
+        pending = self.session.apicall_async('system.echo', message='hello')
+        self.assertEqual(pending.get()['result']['message'], 'hello')
+        self.session.apicall.assert_called_with('system.echo', message='hello')
+
+    def test_apicall_map(self):
+        self.session.apicall.side_effect = lambda method, **params: params['id']
+        pending = self.session.apicall_map([('shift.get', {'id': n}) for n in range(10)])
+        self.assertEqual(pending.get(), range(10))
+
+    def test_load_async(self):
+        self.session.apicall.return_value = {
+            "result": {
+                "count": "1",
+                "locations": [{"id": "29117", "name": "location 556"}],
+                "page": {"this": {"start": 1, "batch": 25}}
+            }
+        }
+        locations = self.session.Locations()
+        self.session.load_async(locations).wait()
+        self.assertEqual(len(locations.storage), 1)
+        self.assertEqual(locations[0]['name'], 'location 556')
+
+
+if __name__ == '__main__':
+    unittest.main()
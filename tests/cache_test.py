@@ -0,0 +1,76 @@
+import shiftboard
+import json
+import unittest
+from mock import MagicMock
+from shiftboard.cache import ResponseCache
+from shiftboard.transport import Response
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(ttl={'workgroup.list': 60, 'shift.list': 60}, maxsize=2)
+        self.session = shiftboard.Session('mock_access_key', 'mock_signature_key',
+                                          url='mock_url', cache=self.cache)
+        self.session._apicall = MagicMock(name='_apicall', side_effect=lambda method, params: {"result": dict(params)})
+
+    def test_hit(self):
+        first = self.session.apicall('workgroup.list', select={'id': 1})
+        second = self.session.apicall('workgroup.list', select={'id': 1})
+        self.assertTrue(first is second)
+        self.assertEqual(self.session._apicall.call_count, 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_uncached_method(self):
+        self.session.apicall('account.list')
+        self.session.apicall('account.list')
+        self.assertEqual(self.session._apicall.call_count, 2)
+
+    def test_lru(self):
+        for n in (1, 2, 1, 3, 1, 2):
+            self.session.apicall('workgroup.list', select={'id': n})
+        # 2 was least recently used when 3 was added
+        self.assertEqual(self.session._apicall.call_count, 4)
+        self.assertEqual(self.cache.stats()['size'], 2)
+
+    def test_invalidation(self):
+        self.session.apicall('shift.list')
+        self.session.apicall('workgroup.list')
+        self.session.apicall('shift.create', workgroup=1)
+        self.session.apicall('shift.list')
+        self.session.apicall('workgroup.list')
+        self.assertEqual(self.session._apicall.call_count, 4)
+        self.assertEqual(self.cache.stats()['invalidations'], 1)
+
+    def test_reads_keep_cache(self):
+        self.session.apicall('shift.list')
+        self.session.references['refs'] = {}
+        self.session.apicall('shift.getOfferedTrade', id=1)
+        self.session.apicall('account.listMemberships', id=1)
+        self.session.apicall('shift.list')
+        self.assertEqual(self.session._apicall.call_count, 3)
+        self.assertEqual(self.cache.stats()['invalidations'], 0)
+        self.assertEqual(self.session.references, {'refs': {}})
+
+    def test_batch_invalidation(self):
+        self.session.apicall('shift.list')
+        self.session.transport = MagicMock(name='transport')
+        self.session.transport.request.return_value = Response(200, {}, '[]')
+        self.session.apicall_batch([('shift.update', {'id': 1})])
+        self.session.apicall('shift.list')
+        self.assertEqual(self.session._apicall.call_count, 2)
+        self.assertEqual(self.cache.stats()['invalidations'], 1)
+
+    def test_shared_between_users(self):
+        other = shiftboard.TokenSession('other_token', 'mock_access_key', 'mock_signature_key',
+                                        url='mock_url', cache=self.cache)
+        other._apicall = MagicMock(name='_apicall', side_effect=lambda method, params: {"result": {}})
+        self.session.apicall('workgroup.list')
+        other.apicall('workgroup.list')
+        other.apicall('workgroup.list')
+        self.assertEqual(self.session._apicall.call_count, 1)
+        self.assertEqual(other._apicall.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
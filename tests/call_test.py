@@ -0,0 +1,77 @@
+import shiftboard
+import hashlib
+import hmac
+import json
+import unittest
+import urlparse
+from mock import MagicMock
+from shiftboard.call import _ApiCallToken
+from shiftboard.retry import RetryPolicy
+from shiftboard.transport import Response
+
+
+class TestApiCall(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = MagicMock(name='transport')
+        self.transport.request.return_value = Response(
+            200, {}, '{"jsonrpc": "2.0", "id": "1", "result": {"message": "hi"}}')
+        self.session = shiftboard.Session('mock_access_key', 'mock_signature_key',
+                                          url='mock_url', transport=self.transport,
+                                          retry=RetryPolicy(retries=0))
+
+    def signature(self, json_params):
+        return hmac.HMAC('mock_signature_key', 'methodsystem.echoparams' + json_params,
+                         hashlib.sha1).digest().encode('base64').strip()
+
+    def test_get(self):
+        result = self.session.echo('hi')
+        self.assertEqual(result['result']['message'], 'hi')
+        url = self.transport.request.call_args[0][0]
+        query = dict(urlparse.parse_qsl(urlparse.urlsplit(url).query))
+        json_params = query['params'].decode('base64')
+        self.assertEqual(json.loads(json_params), {'message': 'hi'})
+        self.assertEqual(query['signature'], self.signature(json_params))
+
+    def test_post(self):
+        self.session.post = True
+        self.session.echo('hi')
+        url, body, headers = self.transport.request.call_args[0]
+        self.assertEqual(url, 'mock_url')
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        request = json.loads(body)
+        self.assertEqual(request['method'], 'system.echo')
+        self.assertEqual(request['params'], {'message': 'hi'})
+        self.assertEqual(request['signature'], self.signature(json.dumps(request['params'])))
+
+    def test_post_token(self):
+        self.session.post = True
+        self.session.token = 'mock_token'
+        call = _ApiCallToken(self.session, 'system.echo')
+        call.json_params = '{}'
+        request = json.loads(call.body)
+        self.assertEqual(request['token'], 'mock_token')
+        self.assertEqual(request['params'], {})
+
+    def test_batch(self):
+        self.transport.request.return_value = Response(200, {}, json.dumps([
+            {'jsonrpc': '2.0', 'id': '2', 'error': {'code': 'no_shift', 'data': {'message': 'no such shift'}}},
+            {'jsonrpc': '2.0', 'id': '1', 'result': {'first_name': 'Joe'}},
+        ]))
+        with self.session.batch() as batch:
+            me = batch.apicall('account.self')
+            shift = batch.apicall('shift.get', id=5)
+        url, body, headers = self.transport.request.call_args[0]
+        requests = json.loads(body)
+        self.assertEqual([r['method'] for r in requests], ['account.self', 'shift.get'])
+        self.assertEqual(requests[1]['params'], {'id': 5})
+        self.assertEqual(me.result()['result']['first_name'], 'Joe')
+        self.assertRaises(shiftboard.RPCError, shift.result)
+
+    def test_http_error(self):
+        self.transport.request.return_value = Response(500, {}, '')
+        self.assertRaises(shiftboard.RPCError, self.session.echo)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import shiftboard
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+from mock import MagicMock
+from shiftboard.cassette import CassetteError, RecordingTransport, ReplayTransport
+from shiftboard.retry import RetryPolicy
+from shiftboard.transport import BodyReader, Response, StreamResponse
+
+
+def echo(url, body=None, headers={}):
+    """Fake transport request, echoing each call's params"""
+    requests = json.loads(body) if body else [{'id': 1, 'params': {'fake': True}}]
+    if isinstance(requests, dict):
+        return Response(200, {'Content-Type': 'application/json'}, json.dumps(
+            {'jsonrpc': '2.0', 'id': requests['id'], 'result': requests['params']}))
+    return Response(200, {}, json.dumps(
+        [{'jsonrpc': '2.0', 'id': r['id'], 'result': r['params']} for r in requests]))
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test.cassette')
+        self.transport = MagicMock(name='transport')
+        self.transport.request.side_effect = echo
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def session(self, transport, **kwargs):
+        return shiftboard.Session('mock_access_key', 'mock_signature_key',
+                                  url='mock_url', transport=transport,
+                                  retry=RetryPolicy(retries=0), **kwargs)
+
+    def record(self, **kwargs):
+        session = self.session(RecordingTransport(self.transport, self.path), **kwargs)
+        session.echo('one')
+        with session.batch() as batch:
+            batch.apicall('system.echo', message='two')
+            batch.apicall('system.echo', message='three')
+        session.close()
+
+    def test_scrubbed(self):
+        self.record(post=True)
+        text = gzip.open(self.path).read()
+        self.assertEqual(len(text.splitlines()), 2)
+        self.assertFalse('mock_access_key' in text)
+        self.assertFalse('signature' in text)
+        entry = json.loads(text.splitlines()[0])
+        self.assertEqual(entry['request']['calls'],
+                         [{'method': 'system.echo', 'params': {'message': 'one'}}])
+        self.assertEqual(entry['headers'], {'content-type': 'application/json'})
+
+    def test_replay(self):
+        self.record(post=True)
+        # different call ids, and GET rather than POST
+        session = self.session(ReplayTransport(self.path), id=100)
+        self.assertEqual(session.echo('one')['result'], {'message': 'one'})
+        calls = session.apicall_batch([('system.echo', {'message': 'two'}),
+                                       ('system.echo', {'message': 'three'})])
+        self.assertEqual([c.result()['result']['message'] for c in calls],
+                         ['two', 'three'])
+        self.assertRaises(CassetteError, session.echo, 'four')
+
+    def test_stream(self):
+        def stream(url, body=None, headers={}):
+            response = echo(url, body)
+            return StreamResponse(response.status, response.headers,
+                                  BodyReader(StringIO(response.body)), release)
+        release = MagicMock(name='release')
+        self.transport.stream.side_effect = stream
+        recording = RecordingTransport(self.transport, self.path)
+        response = recording.stream('mock_url', json.dumps(
+            {'id': 1, 'method': 'shift.list', 'params': {'page': {'start': 1}}}))
+        body = response.reader.readall()
+        response.close()
+        release.assert_called_once_with(True)
+        recording.close()
+
+        replay = ReplayTransport(self.path)
+        response = replay.stream('mock_url', json.dumps(
+            {'id': 2, 'method': 'shift.list', 'params': {'page': {'start': 1}}}))
+        self.assertEqual(response.reader.readall(), body)
@@ -0,0 +1,34 @@
+import shiftboard
+import datetime
+import json
+import unittest
+from shiftboard.codec import Codec, get_codec
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_default(self):
+        self.assertTrue(get_codec().name in ('ujson', 'simplejson', 'json'))
+
+    def test_dates(self):
+        codec = Codec(json)
+        params = {'select': {'start_date': datetime.date(2016, 1, 2),
+                             'end': [datetime.datetime(2016, 1, 3, 4, 5, 6)]}}
+        self.assertEqual(json.loads(codec.dumps(params)),
+                         {'select': {'start_date': '2016-01-02', 'end': ['2016-01-03T04:05:06']}})
+
+    def test_roundtrip(self):
+        for name in ('ujson', 'simplejson', 'json'):
+            try:
+                codec = get_codec(name)
+            except ImportError:
+                continue
+            data = {'shifts': [{'id': '1', 'covered': True, 'qty': 2, 'subject': u'caf\xe9 / bar'}]}
+            self.assertEqual(codec.loads(codec.dumps(data)), data)
+
+    def test_missing_backend(self):
+        self.assertRaises(ImportError, get_codec, 'no_such_json_backend')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import shiftboard
+import datetime
+import unittest
+from mock import patch
+from shiftboard import columns
+from shiftboard.shift import Shifts
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+FIELDS = ['id', 'workgroup', 'covering_member', 'start_date', 'end_date', 'subject']
+
+
+def stored_shifts():
+    shifts = Shifts(shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url'))
+    shifts.storeBatch({
+        'count': 3,
+        'page': {'this': {'start': 1, 'batch': 25}},
+        'shifts': [
+            {'id': '1', 'workgroup': '3', 'covering_member': '9', 'subject': 'a',
+             'start_date': '2016-01-01T09:00:00', 'end_date': '2016-01-01T17:00:00'},
+            {'id': '2', 'workgroup': '4', 'covering_member': None, 'subject': 'b',
+             'start_date': '2016-01-02', 'end_date': None},
+            {'id': '3', 'workgroup': '3', 'covering_member': '8', 'subject': 'c',
+             'start_date': '2016-01-03T22:00:00', 'end_date': '2016-01-04T02:30:00'},
+        ],
+        'referenced_objects': {'workgroup': [{'id': '3', 'name': 'x'}, {'id': '4', 'name': 'y'}]},
+    })
+    return shifts
+
+
+class TestColumns(unittest.TestCase):
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_arrays(self):
+        cols = stored_shifts().to_columns(FIELDS)
+        self.assertEqual(cols['id'].tolist(), [1, 2, 3])
+        # denormalized workgroups give their ids
+        self.assertEqual(cols['workgroup'].tolist(), [3, 4, 3])
+        self.assertEqual(cols['covering_member'].tolist(), [9, columns.MISSING_ID, 8])
+        self.assertEqual(str(cols['start_date'].dtype), 'datetime64[s]')
+        hours = (cols['end_date'] - cols['start_date']) / numpy.timedelta64(1, 'h')
+        self.assertEqual(hours[0], 8)
+        self.assertTrue(numpy.isnan(hours[1]))
+        self.assertEqual(hours[2], 4.5)
+        self.assertEqual(list(cols['subject']), ['a', 'b', 'c'])
+
+    @unittest.skipIf(pandas is None, 'pandas is not installed')
+    def test_frame(self):
+        frame = stored_shifts().to_columns(FIELDS, frame=True)
+        self.assertEqual(list(frame.columns), FIELDS)
+        self.assertEqual(frame.groupby('workgroup').size().to_dict(), {3: 2, 4: 1})
+
+    def test_lists(self):
+        with patch.object(columns, 'numpy', None):
+            cols = stored_shifts().to_columns(FIELDS)
+        self.assertEqual(cols['workgroup'], [3, 4, 3])
+        self.assertEqual(cols['start_date'], [datetime.datetime(2016, 1, 1, 9),
+                                              datetime.datetime(2016, 1, 2),
+                                              datetime.datetime(2016, 1, 3, 22)])
+        self.assertEqual(cols['end_date'][1], None)
+
+    def test_default_fields(self):
+        cols = stored_shifts().to_columns()
+        self.assertEqual(sorted(cols), sorted(shiftboard.shift.Shift.fields))
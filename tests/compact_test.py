@@ -0,0 +1,60 @@
+import shiftboard
+import datetime
+import unittest
+from shiftboard.compact import CompactRecord, compact_class
+from shiftboard.shift import Shift, Shifts
+from shiftboard.timeclock import Timeclock
+from shiftboard.workgroup import Workgroup
+
+
+SHIFT = {
+    'id': '7', 'subject': 'Morning', 'start_date': '2016-01-01T09:00:00',
+    'workgroup': '3', 'covering_member': None, 'display_time': '9am',
+}
+
+
+class TestCompactRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.session = shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url')
+
+    def test_mapping(self):
+        shift = compact_class(Shift)(self.session, seed=SHIFT)
+        self.assertFalse(hasattr(shift, '__dict__'))
+        self.assertEqual(shift['subject'], 'Morning')
+        self.assertEqual(shift['display_time'], '9am')
+        self.assertEqual(shift.copy(), SHIFT)
+        self.assertEqual(len(shift), len(SHIFT))
+        self.assertTrue('covering_member' in shift)
+        self.assertFalse('end_date' in shift)
+        self.assertEqual(shift.get('end_date', 'none'), 'none')
+        self.assertRaises(KeyError, lambda: shift['end_date'])
+        shift['end_date'] = '2016-01-01T17:00:00'
+        del shift['display_time']
+        self.assertEqual(sorted(shift), ['covering_member', 'end_date', 'id',
+                                         'start_date', 'subject', 'workgroup'])
+        self.assertEqual(shift.pop('missing', 1), 1)
+        self.assertRaises(KeyError, shift.__delitem__, 'display_time')
+
+    def test_borrowed_methods(self):
+        shift = compact_class(Shift)(self.session, seed=SHIFT)
+        self.assertEqual(shift.startDate(), datetime.datetime(2016, 1, 1, 9))
+        self.assertEqual(hash(shift), 7)
+        self.assertEqual(shift.name_plural, 'shifts')
+        # Timeclock.__init__ is borrowed, defaulting the id to the account
+        timeclock = compact_class(Timeclock)(self.session, seed={'account': '12'})
+        self.assertEqual(timeclock['id'], '12')
+
+    def test_results(self):
+        shifts = Shifts(self.session, compact=True)
+        shifts.storeBatch({
+            'count': 1,
+            'page': {'this': {'start': 1, 'batch': 25}},
+            'shifts': [SHIFT],
+            'referenced_objects': {'workgroup': [{'id': '3', 'name': 'Crew'}]},
+        })
+        shift = shifts[0]
+        self.assertTrue(isinstance(shift, CompactRecord))
+        self.assertTrue(isinstance(shift['workgroup'], compact_class(Workgroup)))
+        self.assertEqual(shift.workgroupName(), 'Crew')
+        self.assertEqual(shifts.getAllValues('workgroup'), set(['3']))
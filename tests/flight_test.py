@@ -0,0 +1,48 @@
+import shiftboard
+import threading
+import time
+import unittest
+from mock import MagicMock
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.session = shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url')
+
+        def slow_apicall(method, params):
+            time.sleep(0.1)
+            return {"result": {"method": method, "params": params}}
+
+        self.session._apicall = MagicMock(name='_apicall', side_effect=slow_apicall)
+
+    def call_concurrently(self, method, params_list):
+        results = [None] * len(params_list)
+
+        def call(n):
+            results[n] = self.session.apicall(method, **params_list[n])
+
+        threads = [threading.Thread(target=call, args=(n,)) for n in range(len(params_list))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_coalesced(self):
+        results = self.call_concurrently('workgroup.list', [{'select': {'a': 1, 'b': 2}}] * 5)
+        self.assertEqual(self.session._apicall.call_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.session.flights.coalesced, 4)
+
+    def test_different_params(self):
+        self.call_concurrently('shift.get', [{'id': 1}, {'id': 2}])
+        self.assertEqual(self.session._apicall.call_count, 2)
+
+    def test_writes_not_coalesced(self):
+        self.call_concurrently('shift.delete', [{'id': 1}] * 3)
+        self.assertEqual(self.session._apicall.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
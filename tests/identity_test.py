@@ -0,0 +1,77 @@
+import shiftboard
+import unittest
+from mock import MagicMock
+from shiftboard.identity import IdentityMap
+from shiftboard.shift import Shifts
+from shiftboard.workgroup import Workgroup
+from pages import shift_page
+
+
+class TestIdentityMap(unittest.TestCase):
+
+    def setUp(self):
+        self.session = shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url')
+
+    def test_intern(self):
+        identities = IdentityMap()
+        build = MagicMock(name='build', side_effect=lambda seed: dict(seed))
+        first = identities.intern(Workgroup, {'id': '1'}, build)
+        self.assertTrue(identities.intern(Workgroup, {'id': '1'}, build) is first)
+        self.assertEqual(build.call_count, 1)
+        self.assertFalse(identities.intern('workgroup', {'id': '1'}) is first)
+        # no id, no interning
+        self.assertFalse(identities.intern(Workgroup, {}, build) is
+                         identities.intern(Workgroup, {}, build))
+        self.assertEqual(len(identities), 2)
+        # later seeds update the interned object
+        self.assertTrue(identities.intern(Workgroup, {'id': '1', 'name': 'wg'}, build) is first)
+        self.assertEqual(first, {'id': '1', 'name': 'wg'})
+
+    def test_shared(self):
+        shifts = Shifts(self.session, batch=10)
+        shifts.storeBatch(shift_page(1, 10, 20))
+        shifts.storeBatch(shift_page(11, 10, 20))
+        others = Shifts(self.session, batch=10)
+        others.storeBatch(shift_page(1, 10, 20))
+        workgroup = shifts[0]['workgroup']
+        self.assertTrue(isinstance(workgroup, Workgroup))
+        self.assertEqual(workgroup['name'], 'wg 2')
+        for shift in [shifts[18], others[3]]:
+            self.assertTrue(shift['workgroup'] is workgroup)
+        self.assertTrue(shifts[0]['timezone'] is others[5]['timezone'])
+        self.assertEqual(len(self.session.identities), 4)
+
+    def test_merged(self):
+        Shifts(self.session).storeBatch(shift_page(1, 10, 10))
+        page = shift_page(1, 10, 10)
+        page['referenced_objects']['workgroup'][1]['zipcode'] = '12345'
+        shifts = Shifts(self.session)
+        shifts.storeBatch(page)
+        self.assertEqual(shifts[0]['workgroup']['zipcode'], '12345')
+        self.assertEqual(shifts[0]['workgroup']['name'], 'wg 2')
+
+    def test_latest_wins(self):
+        old = Shifts(self.session)
+        old.storeBatch(shift_page(1, 10, 10))
+        page = shift_page(1, 10, 10)
+        page['referenced_objects']['workgroup'][1]['name'] = 'renamed'
+        shifts = Shifts(self.session)
+        shifts.storeBatch(page)
+        self.assertTrue(shifts[0]['workgroup'] is old[0]['workgroup'])
+        self.assertEqual(old[0]['workgroup']['name'], 'renamed')
+
+    def test_compact(self):
+        shifts = Shifts(self.session, batch=10, compact=True)
+        shifts.storeBatch(shift_page(1, 10, 10))
+        self.assertTrue(shifts[1]['workgroup'] is shifts[4]['workgroup'])
+        self.assertFalse(isinstance(shifts[1]['workgroup'], Workgroup))
+
+    def test_cleared_by_changes(self):
+        self.session._apicall = MagicMock(name='_apicall', return_value={'result': {}})
+        Shifts(self.session).storeBatch(shift_page(1, 10, 10))
+        self.session.apicall('workgroup.update', id='1', name='renamed')
+        self.assertEqual(len(self.session.identities), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import shiftboard
+import subprocess
+import sys
+import unittest
+from mock import patch
+
+LOADED = """
+import sys
+%s
+print ' '.join(sorted(name for name, module in sys.modules.items() if module))
+"""
+
+
+def modules_loaded(code):
+    """Modules loaded by running code in a new interpreter"""
+    output = subprocess.check_output([sys.executable, '-c', LOADED % (code,)])
+    return set(output.split())
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def test_import(self):
+        loaded = modules_loaded('import shiftboard')
+        self.assertFalse('shiftboard.session' in loaded)
+        self.assertFalse('shiftboard.shift' in loaded)
+        self.assertFalse('urllib2' in loaded)
+
+    def test_session(self):
+        loaded = modules_loaded("import shiftboard; shiftboard.Session('id', 'key')")
+        self.assertTrue('shiftboard.session' in loaded)
+        self.assertFalse('shiftboard.result' in loaded)
+        self.assertFalse('multiprocessing.pool' in loaded)
+
+    def test_model(self):
+        loaded = modules_loaded("import shiftboard; shiftboard.Session('id', 'key').Shifts")
+        self.assertTrue('shiftboard.shift' in loaded)
+        self.assertFalse('shiftboard.tradeboard' in loaded)
+
+    def test_names(self):
+        from shiftboard import Shift, Timeclock
+        self.assertEqual(Shift.name, 'shift')
+        self.assertTrue(shiftboard.RPCError)
+        self.assertRaises(AttributeError, getattr, shiftboard, 'NoSuchName')
+
+    def test_session_names(self):
+        from shiftboard.session import Shifts
+        import shiftboard.session
+        self.assertTrue(shiftboard.session.Shift is shiftboard.Shift)
+        self.assertEqual(Shifts.__name__, 'Shifts')
+        loaded = modules_loaded('import shiftboard.session')
+        self.assertFalse('shiftboard.shift' in loaded)
+
+    def test_patch_session_module(self):
+        # names patched on the session module's stand-in reach its code
+        with patch('shiftboard.session.Transport') as transport:
+            session = shiftboard.Session('id', 'key')
+        self.assertTrue(session.transport is transport.return_value)
+        self.assertFalse(isinstance(shiftboard.Session('id', 'key').transport, type(transport)))
+        self.assertRaises(AttributeError, getattr, session, 'NoSuchModel')
+
+
+if __name__ == '__main__':
+    unittest.main()
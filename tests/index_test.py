@@ -0,0 +1,63 @@
+import shiftboard
+import datetime
+import unittest
+from shiftboard.shift import Shifts
+from pages import shift_page
+
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        session = shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url')
+        self.shifts = Shifts(session, batch=10)
+        self.shifts.storeBatch(shift_page(1, 10, 20))
+        self.index = self.shifts.index(load=False)
+
+    def ids(self, records):
+        return [int(record['id']) for record in records]
+
+    def test_where(self):
+        self.assertEqual(self.ids(self.index.where(workgroup='2')), [1, 4, 7, 10])
+        self.assertEqual(self.ids(self.index.where(workgroup=2, covered=False)), [1, 7])
+        self.assertEqual(self.ids(self.index.where(workgroup=['1', '3'], id=[3, 4, 5])), [3, 5])
+        self.assertEqual(self.index.count(location='7'), 10)
+        self.assertEqual(self.index.where(location='8'), [])
+
+    def test_denormalized(self):
+        workgroup = self.shifts[0]['workgroup']
+        self.assertEqual(workgroup['name'], 'wg 2')
+        self.assertEqual(self.ids(self.index.where(workgroup=workgroup)), [1, 4, 7, 10])
+
+    def test_between(self):
+        between = (datetime.date(2016, 1, 3), '2016-01-06T09:00:00')
+        self.assertEqual(self.ids(self.index.where(between=between)), [3, 4, 5])
+        self.assertEqual(self.ids(self.index.where(between=between, covered=True)), [4])
+        self.assertEqual(self.ids(self.index.where(between=(datetime.date(2016, 1, 9), None))),
+                         [9, 10])
+
+    def test_unindexed_field(self):
+        self.assertEqual(self.ids(self.index.where(subject=None, workgroup='1')), [3, 6, 9])
+
+    def test_follows_storage(self):
+        self.shifts.storeBatch(shift_page(11, 10, 20))
+        self.assertEqual(self.index.count(workgroup='2'), 7)
+        self.assertEqual(self.ids(self.index.where(between=('2016-01-19', None))), [19, 20])
+        # a page stored again replaces its records
+        self.shifts.storeBatch(shift_page(11, 10, 20))
+        self.assertEqual(self.index.count(), 20)
+        self.index.close()
+        self.assertEqual(self.shifts.listeners, [])
+
+    def test_evictions(self):
+        session = shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url')
+        shifts = Shifts(session, batch=10, max_pages=1)
+        self.assertRaises(ValueError, shifts.index)
+        index = shifts.index(load=False)
+        shifts.storeBatch(shift_page(1, 10, 20))
+        shifts.storeBatch(shift_page(11, 10, 20))
+        self.assertEqual(self.ids(index.where(location='7')), range(11, 21))
+        self.assertEqual(self.ids(index.where(between=(None, '2016-01-15'))), range(11, 15))
+
+
+if __name__ == '__main__':
+    unittest.main()
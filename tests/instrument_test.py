@@ -0,0 +1,75 @@
+import shiftboard
+import json
+import unittest
+from mock import MagicMock
+from shiftboard.instrument import CallStats, Histogram
+from shiftboard.transport import Response
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = MagicMock(name='transport')
+        self.session = shiftboard.Session('mock_access_key', 'mock_signature_key',
+                                          url='mock_url', transport=self.transport)
+        self.stats = CallStats().attach(self.session)
+
+    def respond(self, response):
+        body = json.dumps(response)
+        self.transport.request.return_value = Response(200, {}, body, len(body) // 2)
+
+    def test_hooks(self):
+        events = []
+        self.session.on('before_request', lambda event: events.append(('before', event.method)))
+        self.session.on('after_response', lambda event: events.append(('after', event.method)))
+        self.respond({'result': {}, 'seconds': '0.25'})
+        self.session.echo()
+        self.assertEqual(events, [('before', 'system.echo'), ('after', 'system.echo')])
+        self.assertRaises(ValueError, self.session.on, 'no_such_event', None)
+
+    def test_stats(self):
+        self.respond({'result': {'count': 0}, 'seconds': '0.25'})
+        self.session.apicall('shift.list')
+        self.session.apicall('shift.list', page={'start': 2})
+        self.respond({'error': {'code': 'bad', 'data': {'message': 'bad'}}})
+        self.assertRaises(shiftboard.RPCError, self.session.apicall, 'shift.list', select={})
+        snapshot = self.stats.snapshot()['shift.list']
+        self.assertEqual(snapshot['calls'], 3)
+        self.assertEqual(snapshot['errors'], 1)
+        self.assertEqual(snapshot['server_seconds'], 0.5)
+        self.assertTrue(snapshot['wire_bytes'] < snapshot['response_bytes'])
+        self.assertTrue(snapshot['p50'] <= snapshot['p99'])
+        self.assertTrue('shift.list' in json.loads(self.stats.export()))
+
+    def test_unexpected_error(self):
+        errors = []
+        self.session.on('on_error', lambda event: errors.append(event.error))
+        # (a proxy's error page, say)
+        self.transport.request.return_value = Response(200, {}, '<html>Bad Gateway</html>')
+        self.assertRaises(ValueError, self.session.apicall, 'shift.list')
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.stats.snapshot()['shift.list']['errors'], 1)
+
+    def test_batch(self):
+        self.transport.request.return_value = Response(200, {}, json.dumps([
+            {'jsonrpc': '2.0', 'id': '1', 'result': {}},
+            {'jsonrpc': '2.0', 'id': '2', 'error': {'code': 'bad', 'data': {'message': 'bad'}}},
+        ]))
+        self.session.apicall_batch([('account.self', {}), ('shift.get', {'id': 5})])
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['account.self']['calls'], 1)
+        self.assertEqual(snapshot['account.self']['errors'], 0)
+        self.assertEqual(snapshot['shift.get']['errors'], 1)
+        self.assertEqual(snapshot['shift.get']['response_bytes'],
+                         self.transport.request.return_value.decoded_bytes // 2)
+
+    def test_histogram(self):
+        histogram = Histogram()
+        for ms in range(1, 101):
+            histogram.add(ms / 1000.0)
+        self.assertAlmostEqual(histogram.percentile(50), 0.05, delta=0.01)
+        self.assertAlmostEqual(histogram.percentile(99), 0.099, delta=0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import shiftboard
+import datetime
+import unittest
+from mock import MagicMock, patch
+from shiftboard import isodate
+from shiftboard.shift import Shift
+from shiftboard.timeclock import Timeclock
+
+
+class TestIsoDate(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(isodate.parse('2016-02-03T04:05:06'),
+                         datetime.datetime(2016, 2, 3, 4, 5, 6))
+        self.assertEqual(isodate.parse('2016-02-03T04:05:06Z'),
+                         datetime.datetime(2016, 2, 3, 4, 5, 6))
+        self.assertEqual(isodate.parse('2016-02-03'), datetime.datetime(2016, 2, 3))
+        self.assertRaises(ValueError, isodate.parse, '2016/02/03')
+        self.assertRaises(ValueError, isodate.parse, '2016-02-30')
+        self.assertRaises(ValueError, isodate.parse_datetime, '2016-02-03')
+
+    def test_cache(self):
+        with patch.object(isodate, '_cache', dict()) as cache:
+            first = isodate.parse('2016-02-03T04:05:06')
+            self.assertTrue(isodate.parse('2016-02-03T04:05:06') is first)
+            self.assertEqual(len(cache), 1)
+
+    def test_shift(self):
+        session = MagicMock(name='session')
+        shift = Shift(session, seed={'start_date': '2016-02-03T09:00:00',
+                                     'end_date': '2016-02-03T17:30:00',
+                                     'created': '2016-01-01T00:00:00Z'})
+        self.assertFalse(shift.allDay())
+        self.assertEqual(shift.endDate(), datetime.datetime(2016, 2, 3, 17, 30))
+        self.assertEqual(shift.createDate(), datetime.datetime(2016, 1, 1))
+        allday = Shift(session, seed={'start_date': '2016-02-03'})
+        self.assertTrue(allday.allDay())
+        self.assertEqual(allday.startDate(), datetime.datetime(2016, 2, 3))
+        self.assertEqual(allday.endDate(), None)
+        self.assertEqual(allday.time(), '(All Day)')
+
+    def test_timeclock(self):
+        session = MagicMock(name='session')
+        timeclock = Timeclock(session, seed={'account': '1',
+                                             'clocked_in': '2016-02-03T09:00:00Z',
+                                             'clocked_out': '2016-02-03T17:00:00Z'})
+        offset = datetime.datetime.now() - datetime.datetime.utcnow()
+        offset = datetime.timedelta(minutes=round(offset.total_seconds() / 60))
+        self.assertEqual(timeclock.startTime(), datetime.datetime(2016, 2, 3, 9) + offset)
+        self.assertEqual(timeclock.endTime(), datetime.datetime(2016, 2, 3, 17) + offset)
+        timeclock['clocked_out_local'] = '2016-02-03T10:00:00'
+        self.assertEqual(timeclock.endTime(), datetime.datetime(2016, 2, 3, 10))
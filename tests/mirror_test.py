@@ -0,0 +1,86 @@
+import shiftboard
+import datetime
+import unittest
+from mock import MagicMock, patch
+from shiftboard.mirror import Mirror
+
+
+class TestMirror(unittest.TestCase):
+
+    def setUp(self):
+        self.session = shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url')
+        self.shifts = [
+            {"id": str(n), "workgroup": str(n % 2), "subject": "shift %d" % n,
+             "start_date": "2016-01-%02dT09:00:00" % n}
+            for n in range(1, 21)
+        ]
+        self.workgroups = [{"id": "0", "name": "evens"}, {"id": "1", "name": "odds"}]
+
+        def apicall(method, select={}, page={}, **kwargs):
+            if method == 'shift.list':
+                plural = 'shifts'
+                records = [s for s in self.shifts
+                           if select['start_date'] <= s['start_date'][:10] <= select['end_date']]
+            else:
+                plural = 'workgroups'
+                records = self.workgroups
+            start = page['start']
+            return {"result": {
+                "count": len(records),
+                plural: records[start - 1:start - 1 + page['batch']],
+                "page": {"this": {"start": start, "batch": page['batch']}},
+            }}
+
+        self.session.apicall = MagicMock(name='apicall', side_effect=apicall)
+        self.mirror = Mirror(self.session)
+        self.start = datetime.date(2016, 1, 1)
+        self.end = datetime.date(2016, 1, 31)
+
+    def sync(self, full=False):
+        return self.mirror.sync(self.start, self.end, kinds=('shift', 'workgroup'), full=full)
+
+    def test_sync(self):
+        stats = self.sync()
+        self.assertEqual(stats['shift']['added'], 20)
+        self.assertEqual(stats['workgroup']['added'], 2)
+        shifts = self.mirror.Shifts(select={'workgroup': '1'})
+        self.assertEqual(len(shifts), 10)
+        self.assertEqual(shifts[0]['subject'], 'shift 1')
+        self.assertEqual(shifts[9].startDate(), datetime.datetime(2016, 1, 19, 9))
+
+    def test_unlocked_while_fetching(self):
+        apicall = self.session.apicall.side_effect
+
+        def unlocked(method, **kwargs):
+            self.assertFalse(self.mirror.lock.locked())
+            return apicall(method, **kwargs)
+
+        self.session.apicall.side_effect = unlocked
+        with patch.object(shiftboard, 'MAX_BATCH_SIZE', 3):
+            stats = self.sync()
+        self.assertEqual(stats['shift']['added'], 20)
+        self.assertEqual(len(self.mirror.Shifts()), 20)
+
+    def test_incremental(self):
+        self.sync()
+        self.shifts[0]['subject'] = 'changed'
+        del self.shifts[-1]
+        stats = self.sync(full=True)
+        self.assertEqual(stats['shift']['updated'], 1)
+        self.assertEqual(stats['shift']['deleted'], 1)
+        self.assertEqual(stats['shift']['unchanged'], 18)
+        self.assertEqual(stats['workgroup']['unchanged'], 2)
+        shifts = self.mirror.Shifts(select={'start_date': '2016-01-01', 'end_date': '2016-01-31'})
+        self.assertEqual(len(shifts), 19)
+        self.assertEqual(shifts[0]['subject'], 'changed')
+
+    def test_settled_windows_skipped(self):
+        self.sync()
+        calls = self.session.apicall.call_count
+        stats = self.sync()
+        self.assertEqual(stats['shift']['skipped'], 5)
+        self.assertEqual(self.session.apicall.call_count, calls + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
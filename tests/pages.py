@@ -0,0 +1,27 @@
+"""Fake api responses shared by several tests"""
+import datetime
+
+
+def shift_page(start, count, total):
+    """A page of shifts: one a day from 2016-01-01, in workgroups 1-3 and
+    timezone 'tz'"""
+    shifts = []
+    for n in range(start, start + count):
+        shifts.append({
+            'id': str(n),
+            'workgroup': str(n % 3 + 1),
+            'location': '7',
+            'timezone': 'tz',
+            'covered': n % 2 == 0,
+            'start_date': (datetime.datetime(2016, 1, 1, 9) +
+                           datetime.timedelta(days=n - 1)).isoformat(),
+        })
+    return {
+        'count': str(total),
+        'shifts': shifts,
+        'page': {'this': {'start': start, 'batch': count}},
+        'referenced_objects': {
+            'workgroup': [{'id': str(n), 'name': 'wg %d' % n} for n in (1, 2, 3)],
+            'timezone': [{'id': 'tz', 'name': 'UTC'}],
+        },
+    }
@@ -0,0 +1,250 @@
+import shiftboard
+import threading
+import time
+import unittest
+from mock import MagicMock, patch
+from shiftboard import result
+from shiftboard.location import Location
+
+
+def paged_locations(count):
+    """Fake location.list, paging over count locations"""
+    calls = []
+    lock = threading.Lock()
+
+    def apicall(method, page={}, **kwargs):
+        start = max(page.get('start', 1), 1)
+        batch = page.get('batch', 25)
+        with lock:
+            calls.append((start, batch))
+        end = min(start + batch, count + 1)
+        return {
+            "result": {
+                "count": str(count),
+                "locations": [{"id": str(n), "name": "location %d" % n}
+                              for n in range(start, end)],
+                "page": {"this": {"start": start, "batch": batch}},
+            }
+        }
+
+    return MagicMock(name='apicall', side_effect=apicall), calls
+
+
+class TestResults(unittest.TestCase):
+
+    def setUp(self):
+        self.session = shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url')
+        self.session.apicall, self.calls = paged_locations(95)
+
+    def test_load_all_parallel(self):
+        locations = self.session.Locations(batch=10)
+        locations.load_all(workers=4)
+        self.assertEqual(len(locations.storage), 95)
+        self.assertEqual(len(self.calls), 10)
+        self.assertEqual([l['id'] for l in locations], [str(n) for n in range(1, 96)])
+
+    def test_load_all_adaptive(self):
+        locations = self.session.Locations(batch=10, adaptive=True)
+        locations.load_all(workers=4)
+        self.assertEqual(len(locations.storage), 95)
+        # the first page is not fetched again at the grown batch size
+        self.assertEqual(sorted(self.calls), [(1, 10), (11, 20), (31, 20), (51, 20), (71, 20), (91, 20)])
+
+    def test_page_default(self):
+        self.session.Locations(batch=5).getData()
+        self.session.Locations(batch=50).getData()
+        self.assertEqual(self.calls, [(1, 5), (1, 50)])
+
+    def test_prefetch(self):
+        locations = self.session.Locations(batch=25).prefetch()
+        self.assertEqual(len(locations.storage), 95)
+        self.assertEqual(sorted(start for start, batch in self.calls), [1, 26, 51, 76])
+
+    def test_aligned_pages(self):
+        locations = self.session.Locations(batch=10)
+        self.assertEqual(locations[94]['id'], '95')
+        self.assertEqual(locations[85]['id'], '86')
+        self.assertEqual(self.calls, [(91, 10), (81, 10)])
+        # a page partly stored is fetched only up to the stored records
+        locations[83]
+        locations[73]
+        self.assertEqual(self.calls[2:], [(71, 10)])
+        del locations.storage[72]
+        locations.storage.pop(73)
+        locations[72]
+        self.assertEqual(self.calls[3:], [(73, 2)])
+
+    def test_adaptive(self):
+        locations = self.session.Locations(batch=10, adaptive=True)
+        self.assertEqual([l['id'] for l in locations], [str(n) for n in range(1, 96)])
+        self.assertEqual(self.calls, [(1, 10), (11, 20), (31, 40), (71, 80)])
+        self.assertEqual(locations.batch, 80)
+
+    def test_adaptive_random_access(self):
+        locations = self.session.Locations(batch=10, adaptive=True)
+        self.assertEqual(locations[15]['id'], '16')
+        self.assertEqual(locations[55]['id'], '56')
+        # the aligned page (1, 20) starts with a gap, then records 11-20
+        self.assertEqual(locations[25]['id'], '26')
+        self.assertEqual(self.calls, [(11, 10), (41, 20), (21, 20)])
+        self.assertTrue(None not in list(locations))
+
+    def test_adaptive_shrinks(self):
+        locations = self.session.Locations(batch=40, adaptive=True)
+        locations.adapt(40, 40, result.TARGET_PAGE_SECONDS * 3)
+        self.assertEqual(locations.batch, 20)
+        # a short page changes nothing
+        locations.adapt(20, 5, result.TARGET_PAGE_SECONDS * 3)
+        self.assertEqual(locations.batch, 20)
+        response = MagicMock(decoded_bytes=result.MAX_PAGE_BYTES * 2)
+        locations.adapt(20, 20, 0, response)
+        self.assertEqual(locations.batch, 10)
+
+    def test_readahead(self):
+        locations = self.session.Locations(batch=10, readahead=3)
+        self.assertEqual([l['id'] for l in locations], [str(n) for n in range(1, 96)])
+        self.assertEqual(sorted(self.calls), [(n, 10) for n in range(1, 92, 10)])
+
+    def test_stream(self):
+        locations = self.session.Locations(batch=30)
+        pages = list(locations.iter_pages())
+        self.assertEqual([len(page) for page in pages], [30, 30, 30, 5])
+        self.assertEqual(pages[3][4]['id'], '95')
+        self.assertEqual(len(locations), 95)
+        self.assertEqual([l['id'] for l in locations.stream()], [str(n) for n in range(1, 96)])
+        self.assertEqual(locations.storage, {})
+        self.assertEqual(len(self.calls), 8)
+
+    def test_stream_readahead(self):
+        locations = self.session.Locations(batch=10, readahead=2)
+        self.assertEqual([l['id'] for l in locations.stream()], [str(n) for n in range(1, 96)])
+        self.assertEqual(sorted(self.calls), [(n, 10) for n in range(1, 92, 10)])
+        self.assertEqual(locations.storage, {})
+
+    def test_keep_false(self):
+        locations = self.session.Locations(batch=40, keep=False)
+        self.assertEqual(len(locations), 95)
+        self.assertEqual(locations.getAllValues('id'), set(str(n) for n in range(1, 96)))
+        self.assertEqual(locations.storage, {})
+        # random access still stores
+        self.assertEqual(locations[50]['id'], '51')
+        self.assertEqual(len(locations.storage), 40)
+
+    def test_max_pages(self):
+        locations = self.session.Locations(batch=10, max_pages=3)
+        self.assertEqual([l['id'] for l in locations], [str(n) for n in range(1, 96)])
+        self.assertEqual(sorted(locations.storage), range(70, 95))
+        self.assertEqual(locations.evictions, 7)
+        # the first page is used again, so the third least recent is evicted
+        locations[75]
+        self.assertEqual(locations[5]['id'], '6')
+        self.assertEqual(locations.refetches, 1)
+        self.assertEqual(sorted(locations.storage), range(0, 10) + range(70, 80) + range(90, 95))
+        self.assertEqual(locations[70:72], [locations[70], locations[71]])
+        self.assertEqual(len(self.calls), 11)
+
+    def test_max_bytes(self):
+        locations = self.session.Locations(batch=10, max_bytes=1)
+        locations[5]
+        locations[25]
+        self.assertEqual(sorted(locations.storage), range(20, 30))
+        self.assertEqual(locations.evictions, 1)
+        self.assertTrue(locations.stored_bytes > 0)
+
+
+class TestDenormalize(unittest.TestCase):
+
+    def setUp(self):
+        self.session = shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url')
+        self.selects = []
+        self.active = self.most_active = 0
+        lock = threading.Lock()
+
+        def apicall(method, params, sink=None):
+            select, page = params.get('select'), params.get('page')
+            if method == 'shift.update':
+                return {'result': {}}
+            if method == 'shift.list':
+                start, batch = page['start'], page['batch']
+                shifts = [{'id': str(n), 'location': str(n % 30 + 1)}
+                          for n in range(start, min(start + batch, 101))]
+                return {'result': {'count': '100', 'shifts': shifts,
+                                   'page': {'this': {'start': start, 'batch': batch}}}}
+            with lock:
+                self.selects.append(sorted(select['location'], key=int))
+                self.active += 1
+                self.most_active = max(self.most_active, self.active)
+            time.sleep(0.05)
+            with lock:
+                self.active -= 1
+            # location 30 does not exist
+            locations = [{'id': n, 'name': 'location %s' % n}
+                         for n in select['location'] if n != '30']
+            return {'result': {'count': str(len(locations)), 'locations': locations,
+                               'page': {'this': {'start': 1, 'batch': len(locations)}}}}
+
+        self.session._apicall = MagicMock(name='_apicall', side_effect=apicall)
+
+    def test_chunked(self):
+        with patch.object(shiftboard, 'MAX_BATCH_SIZE', 8):
+            shifts = self.session.Shifts(batch=8)
+            shifts.denormalizeLocations()
+        self.assertEqual(shifts[0]['location']['name'], 'location 2')
+        self.assertEqual(shifts[28]['location'], None)
+        # each location is selected once, no more than 8 at a time
+        selected = sum(self.selects, [])
+        self.assertEqual(sorted(selected, key=int), [str(n) for n in range(1, 31)])
+        self.assertTrue(max(len(select) for select in self.selects) <= 8)
+
+    def test_parallel(self):
+        with patch.object(shiftboard, 'MAX_BATCH_SIZE', 8):
+            shifts = self.session.Shifts(batch=8)
+            shifts.denormalizeLocations()
+        self.assertTrue(self.most_active > 1)
+        self.assertEqual([s['location'] and s['location']['id'] for s in shifts],
+                         [None if n % 30 == 29 else str(n % 30 + 1) for n in range(1, 101)])
+        self.assertEqual(len(sum(self.selects, [])), 30)
+
+    def test_compact_separate(self):
+        self.session.Shifts(batch=100, compact=True).denormalizeLocations()
+        shifts = self.session.Shifts(batch=100)
+        shifts.denormalizeLocations()
+        self.assertTrue(isinstance(shifts[0]['location'], Location))
+        self.assertEqual(len(self.selects), 2)
+
+    def test_session_cache(self):
+        self.session.Shifts(batch=100).denormalizeLocations()
+        self.assertEqual(len(self.selects), 1)
+        shifts = self.session.Shifts(batch=100)
+        shifts.denormalizeLocations()
+        self.assertEqual(len(self.selects), 1)
+        self.assertEqual(shifts[99]['location']['name'], 'location 11')
+        # modifying data forgets what was fetched
+        self.session.apicall('shift.update', id='1')
+        self.assertEqual(self.session.references, {})
+
+    def test_no_pool_when_cached(self):
+        self.session.Shifts(batch=100).denormalizeLocations()
+        with patch('multiprocessing.pool.ThreadPool') as pool:
+            self.session.Shifts(batch=100).denormalizeLocations()
+        self.assertFalse(pool.called)
+
+    def test_invalidated_meanwhile(self):
+        select = self.session._apicall.side_effect
+
+        def apicall(method, params, sink=None):
+            if method == 'location.list':
+                # (as by a change made on another thread)
+                self.session.invalidate('shift.update')
+            return select(method, params, sink)
+
+        self.session._apicall.side_effect = apicall
+        with patch.object(shiftboard, 'MAX_BATCH_SIZE', 8):
+            shifts = self.session.Shifts(batch=8)
+            shifts.denormalizeLocations()
+        self.assertEqual(shifts[0]['location']['name'], 'location 2')
+        self.assertEqual(shifts[28]['location'], None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import shiftboard
+import unittest
+from mock import MagicMock
+from shiftboard.retry import RetryPolicy, idempotent, retry_after
+from shiftboard.transport import Response
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(retries=3, backoff=0, budget=2)
+
+    def test_idempotent(self):
+        self.assertTrue(idempotent('shift.list'))
+        self.assertTrue(idempotent('timeclock.status'))
+        self.assertFalse(idempotent('shift.create'))
+        self.assertTrue(idempotent('account.listMemberships'))
+        self.assertTrue(idempotent('shift.getOfferedTrade'))
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after('3'), 3)
+        self.assertEqual(retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+        self.assertEqual(retry_after(None), None)
+
+    def test_retries_transient_failure(self):
+        request = MagicMock(side_effect=[Response(503, {'retry-after': '0'}, ''),
+                                         Response(200, {}, 'ok')])
+        response, retries = self.policy.send(request)
+        self.assertEqual(response.body, 'ok')
+        self.assertEqual(retries, 1)
+        self.assertEqual(self.policy.stats()['retried'], 1)
+
+    def test_not_idempotent(self):
+        request = MagicMock(return_value=Response(503, {}, ''))
+        response, retries = self.policy.send(request, idempotent=False)
+        self.assertEqual(response.status, 503)
+        self.assertEqual(request.call_count, 1)
+
+    def test_budget(self):
+        request = MagicMock(side_effect=IOError('connection refused'))
+        self.assertRaises(IOError, self.policy.send, request)
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(self.policy.stats()['exhausted'], 1)
+
+    def test_session_call(self):
+        transport = MagicMock(name='transport')
+        transport.request.side_effect = [Response(500, {}, ''),
+                                         Response(200, {}, '{"result": {}}')]
+        session = shiftboard.Session('mock_access_key', 'mock_signature_key',
+                                     url='mock_url', transport=transport, retry=self.policy)
+        self.assertEqual(session.apicall('shift.list'), {'result': {}})
+        self.assertEqual(transport.request.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import shiftboard
+import json
+import unittest
+from StringIO import StringIO
+from mock import MagicMock
+from shiftboard.stream import decode
+from shiftboard.transport import BodyReader, StreamResponse
+
+
+class TrickleReader(object):
+    """Reader returning a few bytes at a time"""
+
+    def __init__(self, text, size=7):
+        self.fp = StringIO(text)
+        self.size = size
+
+    def read(self):
+        return self.fp.read(self.size)
+
+
+RESPONSE = {
+    "jsonrpc": "2.0",
+    "id": 12,
+    "result": {
+        "count": 3,
+        "shifts": [
+            {"id": "1", "subject": "first", "qty": 1, "tags": ["a", "b"]},
+            {"id": "2", "subject": "second \"quoted\"", "qty": 12345},
+            {"id": "3", "subject": "third", "covered": True, "qty": 2.5},
+        ],
+        "page": {"this": {"start": 1, "batch": 3}},
+        "referenced_objects": {"workgroup": [{"id": "9", "name": "wg"}]},
+    },
+}
+
+
+class TestStreamDecode(unittest.TestCase):
+
+    def test_decode(self):
+        seen = []
+
+        def element(record):
+            seen.append(record['id'])
+            return record['id']
+
+        for size in (1, 7, 4096):
+            del seen[:]
+            text = json.dumps(RESPONSE, indent=1)
+            result = decode(TrickleReader(text, size), 'shifts', element)
+            self.assertEqual(seen, ['1', '2', '3'])
+            expected = json.loads(text)
+            expected['result']['shifts'] = ['1', '2', '3']
+            self.assertEqual(result, expected)
+
+    def test_truncated(self):
+        text = json.dumps(RESPONSE)[:-10]
+        self.assertRaises(ValueError, decode, TrickleReader(text), 'shifts', lambda r: r)
+
+    def test_session_stream(self):
+        transport = MagicMock(name='transport')
+        release = MagicMock(name='release')
+        transport.stream.return_value = StreamResponse(
+            200, {}, BodyReader(StringIO(json.dumps(RESPONSE))), release)
+        session = shiftboard.Session('mock_access_key', 'mock_signature_key', url='mock_url',
+                                     transport=transport, stream=True)
+        shifts = session.Shifts()
+        self.assertEqual(len(shifts), 3)
+        self.assertEqual(shifts[1]['qty'], 12345)
+        self.assertTrue(isinstance(shifts[0], shiftboard.shift.Shift))
+        release.assert_called_with(True)
+        self.assertFalse(transport.request.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import shiftboard
+import httplib
+import socket
+import threading
+import time
+import unittest
+import zlib
+import BaseHTTPServer
+from StringIO import StringIO
+from shiftboard.transport import BodyReader, PooledTransport, Transport
+
+
+class KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = []
+    requests = []
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.connections.append(self.client_address)
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        if self.path.endswith('slow'):
+            # (the client has given up by now)
+            time.sleep(1)
+            self.close_connection = 1
+            return
+        body = '{"result": "%s"}' % (self.path,)
+        self.send_response(200)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            body = compressor.compress(body * 100) + compressor.flush()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.path.endswith('close'):
+            # (without telling the client)
+            self.close_connection = 1
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPooledTransport(unittest.TestCase):
+
+    def setUp(self):
+        KeepAliveHandler.connections = []
+        KeepAliveHandler.requests = []
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d/api.cgi' % (self.server.server_port,)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_connection(self):
+        transport = PooledTransport(compress=False)
+        for n in range(3):
+            response = transport.request(self.url + '?n=%d' % n)
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.body, '{"result": "/api.cgi?n=%d"}' % n)
+        transport.close()
+        self.assertEqual(len(KeepAliveHandler.connections), 1)
+
+    def test_idle_eviction(self):
+        transport = PooledTransport(idle_timeout=0)
+        transport.request(self.url)
+        transport.request(self.url)
+        transport.close()
+        self.assertEqual(len(KeepAliveHandler.connections), 2)
+
+    def test_compressed(self):
+        transport = PooledTransport()
+        response = transport.request(self.url)
+        transport.close()
+        self.assertEqual(response.body, '{"result": "/api.cgi"}' * 100)
+        self.assertEqual(response.decoded_bytes, 2200)
+        self.assertTrue(response.wire_bytes < response.decoded_bytes)
+
+    def test_stale_connection(self):
+        transport = PooledTransport(compress=False)
+        transport.request(self.url)
+        # the server closes the idle connection; the request is sent again
+        conn, last_used = transport.pools.values()[0][0]
+        conn.sock.shutdown(socket.SHUT_RDWR)
+        self.assertEqual(transport.request(self.url + '?n=1').status, 200)
+        transport.close()
+        self.assertEqual(KeepAliveHandler.requests, ['/api.cgi', '/api.cgi?n=1'])
+        self.assertEqual(len(KeepAliveHandler.connections), 2)
+
+    def test_sent_not_resent(self):
+        transport = PooledTransport(compress=False)
+        transport.request(self.url + '?close')
+        # the request is sent before the closed connection is noticed, so
+        # may have been acted on
+        self.assertRaises(httplib.HTTPException, transport.request, self.url + '?n=1')
+        transport.close()
+        self.assertEqual(len(KeepAliveHandler.connections), 1)
+
+    def test_timeout_not_resent(self):
+        transport = PooledTransport(compress=False, timeout=0.3)
+        transport.request(self.url)
+        self.assertRaises(socket.timeout, transport.request, self.url + '?slow')
+        transport.close()
+        self.assertEqual(KeepAliveHandler.requests, ['/api.cgi', '/api.cgi?slow'])
+
+    def test_session_owns_transport(self):
+        session = shiftboard.Session('mock_access_key', 'mock_signature_key', url=self.url)
+        self.assertTrue(isinstance(session.transport, Transport))
+        self.assertFalse(isinstance(session.transport, PooledTransport))
+        session.close()
+
+
+
+class TestBodyReader(unittest.TestCase):
+
+    def compressed(self, wbits):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, wbits)
+        return compressor.compress('body' * 100) + compressor.flush()
+
+    def test_deflate(self):
+        for wbits in (zlib.MAX_WBITS, -zlib.MAX_WBITS):
+            reader = BodyReader(StringIO(self.compressed(wbits)), 'deflate')
+            self.assertEqual(reader.readall(), 'body' * 100)
+        # (a byte at a time, still undecided after the first)
+        reader = BodyReader(StringIO(self.compressed(-zlib.MAX_WBITS)), 'deflate')
+        self.assertEqual(''.join(iter(lambda: reader.read(1), '')), 'body' * 100)
+
+    def test_corrupt(self):
+        body = self.compressed(16 + zlib.MAX_WBITS)
+        reader = BodyReader(StringIO(body[:10] + 'x' * 20 + body[30:]), 'gzip')
+        self.assertRaises(IOError, reader.readall)
+        reader = BodyReader(StringIO('not compressed'), 'deflate')
+        self.assertRaises(IOError, reader.readall)
+
+
+if __name__ == '__main__':
+    unittest.main()